@@ -2,22 +2,36 @@
 
 from __future__ import annotations
 
+import heapq
 import json
 import sqlite3
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import asdict
+from functools import lru_cache
+from itertools import accumulate
 from typing import Any
 
-from .config import CapsuleConfig, IntentDepth
+from .config import CapsuleConfig
 from .graph import GraphOps
 from .models import (
     ContextCapsule,
     FullModelContext,
     MinimalModelContext,
+    RelevantMacro,
+    RelevantSource,
+    RelevantTest,
     SkeletonColumn,
     SkeletonModelContext,
 )
 from .patterns import PatternExtractor
 from .search import HybridSearch
 
+try:
+    import orjson
+except ImportError:  # optional: pip install ariadne-dbt[fast]
+    orjson = None  # type: ignore[assignment]
+
 
 # ─── Intent detection ─────────────────────────────────────────────────────────
 
@@ -31,16 +45,18 @@ _INTENT_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# Flattened (keyword, intent) pairs, in _INTENT_KEYWORDS order so ties still
+# resolve to the first-listed intent.
+_KEYWORD_INTENTS: tuple[tuple[str, str], ...] = tuple(
+    (kw, intent) for intent, keywords in _INTENT_KEYWORDS.items() for kw in keywords
+)
+
+
+@lru_cache(maxsize=256)  # agents re-send the same task across iterative calls
 def detect_intent(task: str) -> str:
     task_lower = task.lower()
-    scores: dict[str, int] = {}
-    for intent, keywords in _INTENT_KEYWORDS.items():
-        score = sum(1 for kw in keywords if kw in task_lower)
-        if score > 0:
-            scores[intent] = score
-    if not scores:
-        return "explore"
-    return max(scores, key=lambda k: scores[k])
+    scores = Counter(intent for kw, intent in _KEYWORD_INTENTS if kw in task_lower)
+    return scores.most_common(1)[0][0] if scores else "explore"
 
 
 # ─── Token estimation ─────────────────────────────────────────────────────────
@@ -53,68 +69,144 @@ def _estimate_tokens(text: str) -> int:
 
 
 def _estimate_dict_tokens(d: Any) -> int:
-    return _estimate_tokens(json.dumps(d, default=str))
+    # Both branches measure compact UTF-8 bytes, so estimates (and which models
+    # fit the budget) don't depend on whether orjson is installed
+    if orjson is not None:
+        encoded = orjson.dumps(d, default=str, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        encoded = json.dumps(
+            d, default=str, separators=(",", ":"), ensure_ascii=False
+        ).encode()
+    return max(1, len(encoded) // _CHARS_PER_TOKEN)
 
 
-# ─── Skeletonization ──────────────────────────────────────────────────────────
+def _loads_list(raw: Any) -> list[Any]:
+    """Decode a JSON-encoded list column, treating NULL/empty as []."""
+    if not raw:
+        return []
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# JSON quotes/separators around each key/value pair of a flat row dict
+_FLAT_PAIR_OVERHEAD_CHARS = 8
+
+
+def _flat_dict_tokens(d: dict[str, Any]) -> int:
+    """Approximate serialized cost of a flat row dict without serializing it."""
+    chars = sum(len(k) + len(str(v)) + _FLAT_PAIR_OVERHEAD_CHARS for k, v in d.items())
+    return max(1, chars // _CHARS_PER_TOKEN)
+
+
+def _take_within_budget(
+    items: list[dict[str, Any]], token_budget: int
+) -> tuple[list[dict[str, Any]], int]:
+    """Longest prefix of ``items`` whose summed cost fits ``token_budget``."""
+    running = list(accumulate(_flat_dict_tokens(d) for d in items))
+    cut = bisect_right(running, token_budget)
+    return items[:cut], running[cut - 1] if cut else 0
+
+
+# Lower bound on the serialized cost of one skeleton/minimal model; caps how
+# many neighbours can possibly fit in a budget slice.
+_MIN_CONTEXT_TOKENS = 10
+
 
-def _build_full_model(model_row: dict[str, Any], columns: list[dict[str, Any]], tests: list[dict[str, Any]]) -> FullModelContext:
-    col_objects = []
+def _nearest(ids: dict[str, int], token_budget: int) -> list[tuple[str, int]]:
+    """Closest-first neighbours, partially sorted to what the budget can hold."""
+    return heapq.nsmallest(token_budget // _MIN_CONTEXT_TOKENS + 1, ids.items(), key=lambda x: x[1])
+
+
+# ─── Skeletonization ──────────────────────────────────────────────────────────
+#
+# Contexts are built as plain dicts so the budget check can run first; only
+# admitted ones are turned into their dataclasses.
+
+# Approximate JSON framing (keys, quotes, separators) around the text fields,
+# so full-model cost can be counted while building instead of re-serializing.
+_FULL_MODEL_OVERHEAD_CHARS = 170
+_COLUMN_OVERHEAD_CHARS = 60
+_LIST_ITEM_OVERHEAD_CHARS = 4
+
+
+def _full_model_dict(
+    model_row: dict[str, Any], columns: list[dict[str, Any]], tests: list[dict[str, Any]],
+) -> tuple[dict[str, Any], int]:
+    """Build a pivot's full context fields and their estimated token cost."""
+    col_dicts = []
     test_by_col: dict[str, list[str]] = {}
     for t in tests:
         col = t.get("column_name", "")
         if col:
             test_by_col.setdefault(col, []).append(t["test_type"])
 
+    chars = _FULL_MODEL_OVERHEAD_CHARS
     for c in columns:
-        col_objects.append(SkeletonColumn(
-            name=c["name"],
-            data_type=c.get("data_type", ""),
-            description=c.get("description", ""),
-            tests=test_by_col.get(c["name"], []),
-        ))
+        col = {
+            "name": c["name"],
+            "data_type": c.get("data_type", ""),
+            "description": c.get("description", ""),
+            "tests": test_by_col.get(c["name"], []),
+        }
+        col_dicts.append(col)
+        chars += (
+            _COLUMN_OVERHEAD_CHARS + len(col["name"])
+            + len(col["data_type"] or "") + len(col["description"] or "")
+            + sum(len(t) + _LIST_ITEM_OVERHEAD_CHARS for t in col["tests"])
+        )
 
     depends_on: list[str] = []
     raw = model_row.get("depends_on_nodes", "[]")
     try:
-        deps = json.loads(raw)
+        deps = _loads_list(raw)
         depends_on = [d.split(".")[-1] for d in deps if d.startswith("model.")]
-    except (json.JSONDecodeError, TypeError):
+    except (ValueError, TypeError):  # orjson.JSONDecodeError subclasses ValueError
         pass
 
-    return FullModelContext(
-        unique_id=model_row["unique_id"],
-        name=model_row["name"],
-        layer=model_row.get("layer", "other"),
-        materialization=model_row.get("materialization", "view"),
-        file_path=model_row.get("file_path", ""),
-        compiled_sql=model_row.get("compiled_code") or model_row.get("raw_code", ""),
-        description=model_row.get("description", ""),
-        columns=col_objects,
-        tags=json.loads(model_row.get("tags", "[]") or "[]"),
-        depends_on=depends_on,
+    full = {
+        "unique_id": model_row["unique_id"],
+        "name": model_row["name"],
+        "layer": model_row.get("layer", "other"),
+        "materialization": model_row.get("materialization", "view"),
+        "file_path": model_row.get("file_path", ""),
+        "compiled_sql": model_row.get("compiled_code") or model_row.get("raw_code", ""),
+        "description": model_row.get("description", ""),
+        "columns": col_dicts,
+        "tags": _loads_list(model_row.get("tags")),
+        "depends_on": depends_on,
+    }
+    chars += sum(
+        len(full[k] or "") for k in (
+            "unique_id", "name", "layer", "materialization",
+            "file_path", "compiled_sql", "description",
+        )
     )
+    chars += sum(len(x) + _LIST_ITEM_OVERHEAD_CHARS for x in (*full["tags"], *depends_on))
+    return full, max(1, chars // _CHARS_PER_TOKEN)
 
 
-def _build_skeleton_model(model_row: dict[str, Any], columns: list[dict[str, Any]]) -> SkeletonModelContext:
-    return SkeletonModelContext(
-        unique_id=model_row["unique_id"],
-        name=model_row["name"],
-        layer=model_row.get("layer", "other"),
-        materialization=model_row.get("materialization", "view"),
-        columns=[{"name": c["name"], "type": c.get("data_type", "")} for c in columns],
-    )
+def _skeleton_model_dict(
+    model_row: dict[str, Any], columns: list[dict[str, Any]]
+) -> dict[str, Any]:
+    return {
+        "unique_id": model_row["unique_id"],
+        "name": model_row["name"],
+        "layer": model_row.get("layer", "other"),
+        "materialization": model_row.get("materialization", "view"),
+        "columns": [{"name": c["name"], "type": c.get("data_type", "")} for c in columns],
+    }
 
 
-def _build_minimal_model(model_row: dict[str, Any], columns: list[dict[str, Any]]) -> MinimalModelContext:
+def _minimal_model_dict(model_row: dict[str, Any], columns: list[dict[str, Any]]) -> dict[str, Any]:
     key_cols = [c["name"] for c in columns if c.get("is_primary_key") or c.get("is_foreign_key")]
-    return MinimalModelContext(
-        unique_id=model_row["unique_id"],
-        name=model_row["name"],
-        layer=model_row.get("layer", "other"),
-        column_count=len(columns),
-        key_columns=key_cols[:5],
-    )
+    return {
+        "unique_id": model_row["unique_id"],
+        "name": model_row["name"],
+        "layer": model_row.get("layer", "other"),
+        "column_count": len(columns),
+        "key_columns": key_cols[:5],
+    }
 
 
 # ─── Capsule builder ──────────────────────────────────────────────────────────
@@ -143,7 +235,7 @@ class CapsuleBuilder:
     ) -> ContextCapsule:
         budget = token_budget or self._config.default_token_budget
         intent = detect_intent(task)
-        depths: IntentDepth = self._config.intent_depths.get(intent, IntentDepth())
+        up_depth, down_depth = self._config.intent_depths.get(intent, (1, 1))
 
         # ── Step 1: Select pivot models ───────────────────────────────────────
         pivot_ids, confidence, suggested_refinements = self._select_pivots(
@@ -154,22 +246,21 @@ class CapsuleBuilder:
         upstream_ids: dict[str, int] = {}
         downstream_ids: dict[str, int] = {}
         for pid in pivot_ids:
-            for uid, dist in self._graph.upstream(pid, depth=depths.upstream):
+            for uid, dist in self._graph.upstream(pid, depth=up_depth):
                 if uid.startswith("model.") and uid not in pivot_ids:
                     upstream_ids[uid] = min(upstream_ids.get(uid, 999), dist)
-            for uid, dist in self._graph.downstream(pid, depth=depths.downstream):
+            for uid, dist in self._graph.downstream(pid, depth=down_depth):
                 if uid.startswith("model.") and uid not in pivot_ids:
                     downstream_ids[uid] = min(downstream_ids.get(uid, 999), dist)
 
         # ── Step 3: Collect related context ───────────────────────────────────
         tests_map: dict[str, list[dict[str, Any]]] = {}
         macros_map: dict[str, list[dict[str, Any]]] = {}
-        sources_list: list[dict[str, Any]] = []
 
         for pid in pivot_ids:
             tests_map[pid] = self._search.get_tests_for_model(pid)
             macros_map[pid] = self._search.get_macros_for_model(pid)
-            sources_list.extend(self._search.get_sources_for_model(pid))
+        sources_list = self._search.get_sources_for_models(pivot_ids)
 
         # Similar models (awareness only, not in pivot/upstream/downstream)
         all_known = set(pivot_ids) | set(upstream_ids) | set(downstream_ids)
@@ -180,7 +271,7 @@ class CapsuleBuilder:
         try:
             patterns = self._patterns.get_patterns()
             patterns_dict = {
-                "naming": patterns.naming.model_dump(),
+                "naming": asdict(patterns.naming),
                 "common_materializations": patterns.common_materializations,
             }
         except Exception:
@@ -213,24 +304,29 @@ class CapsuleBuilder:
         focus_model: str | None,
         entry_models: list[str] | None = None,
         entry_paths: list[str] | None = None,
+        max_pivots: int | None = None,
     ) -> tuple[list[str], str, list[str]]:
         """Select pivot models and compute confidence.
 
+        ``max_pivots`` overrides ``config.max_pivots`` for this call only.
+
         Returns:
             (pivot_ids, confidence, suggested_refinements)
         """
+        if max_pivots is None:
+            max_pivots = self._config.max_pivots
         pivot_ids: list[str] = []
         seen: set[str] = set()
         has_explicit_entry = False
 
         def _add_pivot(uid: str) -> None:
-            if uid not in seen and len(pivot_ids) < self._config.max_pivots:
+            if uid not in seen and len(pivot_ids) < max_pivots:
                 pivot_ids.append(uid)
                 seen.add(uid)
 
         # 1. Resolve focus_model (highest priority)
         if focus_model:
-            row = self._search.get_model_by_name(focus_model) or self._search.get_model_by_id(focus_model)
+            row = self._search.get_model_by_name_or_id(focus_model)
             if row:
                 _add_pivot(row["unique_id"])
                 has_explicit_entry = True
@@ -238,7 +334,7 @@ class CapsuleBuilder:
         # 2. Resolve entry_models (same priority as focus_model)
         if entry_models:
             for name in entry_models:
-                row = self._search.get_model_by_name(name) or self._search.get_model_by_id(name)
+                row = self._search.get_model_by_name_or_id(name)
                 if row:
                     _add_pivot(row["unique_id"])
                     has_explicit_entry = True
@@ -252,10 +348,10 @@ class CapsuleBuilder:
 
         # 4. Fill remaining slots with search if under max_pivots
         search_bm25_scores: list[float] = []
-        if len(pivot_ids) < self._config.max_pivots:
+        if len(pivot_ids) < max_pivots:
             results = self._search.search(
                 task, intent=intent,
-                limit=self._config.max_pivots - len(pivot_ids) + 2,
+                limit=max_pivots - len(pivot_ids) + 2,
                 exclude_ids=seen,
             )
             search_bm25_scores = [r.bm25_score for r in results]
@@ -340,24 +436,32 @@ class CapsuleBuilder:
                 continue
             cols = self._search.get_columns(pid)
             tests = tests_map.get(pid, [])
-            full = _build_full_model(row, cols, tests)
-            cost = _estimate_dict_tokens(full.model_dump())
+            full, cost = _full_model_dict(row, cols, tests)
             if pivot_tokens + cost <= alloc["pivot"]:
-                pivot_models.append(full)
+                pivot_models.append(FullModelContext(
+                    **{**full, "columns": [SkeletonColumn(**c) for c in full["columns"]]}
+                ))
                 pivot_tokens += cost
 
+        # Upstream/downstream only need identity + layer fields, never the SQL
+        up_candidates = _nearest(upstream_ids, alloc["upstream"])
+        down_candidates = _nearest(downstream_ids, alloc["downstream"])
+        light_rows = self._get_light_model_rows(
+            [uid for uid, _ in up_candidates] + [uid for uid, _ in down_candidates]
+        )
+
         # Build upstream (skeleton level)
         upstream_models = []
         upstream_tokens = 0
-        for uid, dist in sorted(upstream_ids.items(), key=lambda x: x[1]):
-            row = self._get_model_row(uid)
+        for uid, dist in up_candidates:
+            row = light_rows.get(uid)
             if not row:
                 continue
             cols = self._search.get_columns(uid)
-            skel = _build_skeleton_model(row, cols)
-            cost = _estimate_dict_tokens(skel.model_dump())
+            skel = _skeleton_model_dict(row, cols)
+            cost = _estimate_dict_tokens(skel)
             if upstream_tokens + cost <= alloc["upstream"]:
-                upstream_models.append(skel)
+                upstream_models.append(SkeletonModelContext(**skel))
                 upstream_tokens += cost
             else:
                 break
@@ -365,44 +469,27 @@ class CapsuleBuilder:
         # Build downstream (minimal level)
         downstream_models = []
         downstream_tokens = 0
-        for uid, dist in sorted(downstream_ids.items(), key=lambda x: x[1]):
-            row = self._get_model_row(uid)
+        for uid, dist in down_candidates:
+            row = light_rows.get(uid)
             if not row:
                 continue
             cols = self._search.get_columns(uid)
-            mini = _build_minimal_model(row, cols)
-            cost = _estimate_dict_tokens(mini.model_dump())
+            mini = _minimal_model_dict(row, cols)
+            cost = _estimate_dict_tokens(mini)
             if downstream_tokens + cost <= alloc["downstream"]:
-                downstream_models.append(mini)
+                downstream_models.append(MinimalModelContext(**mini))
                 downstream_tokens += cost
             else:
                 break
 
         # Tests and macros
-        relevant_tests: list[dict[str, Any]] = []
-        relevant_macros: list[dict[str, Any]] = []
-        tm_tokens = 0
-        for pid, tests in tests_map.items():
-            for t in tests:
-                cost = _estimate_dict_tokens(t)
-                if tm_tokens + cost <= alloc["tests_macros"] // 2:
-                    relevant_tests.append(t)
-                    tm_tokens += cost
-        for pid, macros in macros_map.items():
-            for m in macros:
-                cost = _estimate_dict_tokens(m)
-                if tm_tokens + cost <= alloc["tests_macros"]:
-                    relevant_macros.append(m)
-                    tm_tokens += cost
-
-        # Deduplicate sources
-        seen_sources: set[str] = set()
-        unique_sources = []
-        for s in sources:
-            sid = s.get("unique_id", "")
-            if sid not in seen_sources:
-                seen_sources.add(sid)
-                unique_sources.append(s)
+        all_tests = [t for tests in tests_map.values() for t in tests]
+        relevant_tests, tm_tokens = _take_within_budget(all_tests, alloc["tests_macros"] // 2)
+        all_macros = [m for macros in macros_map.values() for m in macros]
+        relevant_macros, macro_tokens = _take_within_budget(
+            all_macros, alloc["tests_macros"] - tm_tokens
+        )
+        tm_tokens += macro_tokens
 
         total_tokens = (
             pivot_tokens + upstream_tokens + downstream_tokens + tm_tokens
@@ -415,9 +502,9 @@ class CapsuleBuilder:
             pivot_models=pivot_models,
             upstream_models=upstream_models,
             downstream_models=downstream_models,
-            relevant_tests=relevant_tests,
-            relevant_macros=relevant_macros,
-            relevant_sources=unique_sources,
+            relevant_tests=[RelevantTest(**t) for t in relevant_tests],
+            relevant_macros=[RelevantMacro(**m) for m in relevant_macros],
+            relevant_sources=[RelevantSource(**s) for s in sources],
             project_patterns=patterns,
             similar_models=similar_models,
             session_context={},
@@ -445,13 +532,11 @@ class CapsuleBuilder:
         """
         intent = detect_intent(task)
 
-        # Reuse pivot selection (capped to 5 for broader coverage)
-        old_max = self._config.max_pivots
-        self._config.max_pivots = max(old_max, 5)
+        # Reuse pivot selection (at least 5 pivots for broader coverage)
         pivot_ids, confidence, _ = self._select_pivots(
             task, intent, focus_model, entry_models, entry_paths,
+            max_pivots=max(self._config.max_pivots, 5),
         )
-        self._config.max_pivots = old_max
 
         result: list[dict[str, Any]] = []
         seen: set[str] = set()
@@ -507,3 +592,17 @@ class CapsuleBuilder:
             "SELECT * FROM models WHERE unique_id = ?", (unique_id,)
         ).fetchone()
         return dict(row) if row else None
+
+    def _get_light_model_rows(self, unique_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Fetch the columns skeleton/minimal contexts use, skipping the code blobs."""
+        if not unique_ids:
+            return {}
+        rows = self._conn.execute(
+            """
+            SELECT unique_id, name, layer, materialization, file_path, description, tags
+            FROM models
+            WHERE unique_id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(unique_ids),),
+        ).fetchall()
+        return {r["unique_id"]: dict(r) for r in rows}
@@ -2,18 +2,17 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.table import Table
 
 from .config import load_config
-from .generator import ContextGenerator
-from .indexer import Indexer
+
+# Rendering (rich panels/progress/tables), Jinja and the indexer are imported
+# inside the commands that use them so `ariadne serve` starts without them.
 
 app = typer.Typer(
     name="ariadne",
@@ -23,6 +22,52 @@ app = typer.Typer(
 console = Console()
 
 
+_LARGE_MANIFEST_BYTES = 50_000_000
+
+
+def _warn_if_slow_parser(manifest_path: Path) -> None:
+    """Suggest orjson when parsing a large manifest with the stdlib parser."""
+    from .indexer import orjson
+
+    if orjson is None and manifest_path.stat().st_size > _LARGE_MANIFEST_BYTES:
+        console.print(
+            "[yellow]Note:[/yellow] manifest.json is over 50MB. "
+            "Install [bold]ariadne-dbt\\[fast][/bold] (orjson) for 2-3x faster indexing."
+        )
+
+
+class _PlainProgress:
+    """Stand-in for rich ``Progress`` off a terminal: one line per step, no refresh thread."""
+
+    def __enter__(self) -> _PlainProgress:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def add_task(self, description: str, **kwargs: Any) -> int:
+        console.print(description)
+        return 0
+
+    def update(self, task: int, description: str | None = None, **kwargs: Any) -> None:
+        if description:
+            console.print(description)
+
+
+def _progress() -> Any:
+    """A spinner on an interactive terminal, plain lines under CI/pipes."""
+    if not console.is_terminal:
+        return _PlainProgress()
+
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    )
+
+
 @app.command()
 def init(
     project_root: Optional[Path] = typer.Argument(
@@ -45,6 +90,12 @@ def init(
     2. Build the SQLite index
     3. Generate .claude/CLAUDE.md, .claude/skills/, .claude/context/ files
     """
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from .generator import ContextGenerator
+    from .indexer import Indexer
+
     cfg = load_config(project_root)
 
     if not cfg.manifest_path.exists():
@@ -61,31 +112,30 @@ def init(
         f"Index: [cyan]{cfg.absolute_index_path}[/cyan]",
         border_style="blue",
     ))
+    _warn_if_slow_parser(cfg.manifest_path)
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         # Step 1: Index
         task = progress.add_task("Indexing manifest.json...", total=None)
-        with Indexer(cfg.absolute_index_path) as idx:
-            idx.index_manifest(cfg.manifest_path)
+        with Indexer.from_config(cfg) as idx:
+            with idx.batch():
+                idx.index_manifest(cfg.manifest_path)
 
-            if cfg.catalog_path.exists():
-                progress.update(task, description="Indexing catalog.json...")
-                idx.index_catalog(cfg.catalog_path)
+                if cfg.catalog_path.exists():
+                    progress.update(task, description="Indexing catalog.json...")
+                    idx.index_catalog(cfg.catalog_path)
 
-            if cfg.run_results_path.exists():
-                progress.update(task, description="Indexing run_results.json...")
-                idx.index_run_results(cfg.run_results_path)
+                if cfg.run_results_path.exists():
+                    progress.update(task, description="Indexing run_results.json...")
+                    idx.index_run_results(cfg.run_results_path)
 
             conn = idx.conn
 
             # Print stats
-            model_count = conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
-            source_count = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
-            test_count = conn.execute("SELECT COUNT(*) FROM tests").fetchone()[0]
+            model_count, source_count, test_count = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM models), (SELECT COUNT(*) FROM sources),"
+                " (SELECT COUNT(*) FROM tests)"
+            ).fetchone()
 
             # Step 2: Generate .md files
             if not skip_generate:
@@ -110,9 +160,13 @@ def init(
 
     if written:
         console.print("\n[green]Generated files:[/green]")
+        prefix = str(cfg.dbt_project_root) + os.sep
         for f in written:
-            rel = f.relative_to(cfg.dbt_project_root) if f.is_relative_to(cfg.dbt_project_root) else f
+            fs = str(f)
+            rel = fs[len(prefix):] if fs.startswith(prefix) else fs
             console.print(f"  [cyan]{rel}[/cyan]")
+    elif not skip_generate:
+        console.print("\n[green]Context files are already up to date.[/green]")
 
     console.print("\n[bold green]Next steps:[/bold green]")
     console.print("  1. Start the MCP server: [bold]ariadne serve[/bold]")
@@ -165,12 +219,21 @@ def serve(
 def sync(
     project_root: Optional[Path] = typer.Argument(None),
     skip_generate: bool = typer.Option(False, "--skip-generate"),
+    force: bool = typer.Option(
+        False, "--force", help="Re-index and regenerate even if manifest.json is unchanged"
+    ),
 ) -> None:
     """Re-index and update .md files after dbt compile.
 
     Run this whenever you run `dbt compile` or `dbt build` to keep the
-    context engine synchronized.
+    context engine synchronized. When manifest.json is unchanged since the
+    last run, only catalog/run_results are re-indexed; context files are
+    regenerated whenever their own inputs (targets, Ariadne version, missing
+    files) changed.
     """
+    from .generator import ContextGenerator
+    from .indexer import Indexer
+
     cfg = load_config(project_root)
 
     if not cfg.manifest_path.exists():
@@ -179,31 +242,41 @@ def sync(
             "Run [bold]dbt compile[/bold] first."
         )
         raise typer.Exit(1)
+    _warn_if_slow_parser(cfg.manifest_path)
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("Syncing index...", total=None)
 
-        with Indexer(cfg.absolute_index_path) as idx:
-            idx.index_manifest(cfg.manifest_path)
-            if cfg.catalog_path.exists():
-                progress.update(task, description="Updating catalog data...")
-                idx.index_catalog(cfg.catalog_path)
-            if cfg.run_results_path.exists():
-                progress.update(task, description="Updating run results...")
-                idx.index_run_results(cfg.run_results_path)
-
+        with Indexer.from_config(cfg) as idx:
+            unchanged = not force and idx.manifest_unchanged(cfg.manifest_path)
+            with idx.batch():
+                if not unchanged:
+                    idx.index_manifest(cfg.manifest_path)
+                if cfg.catalog_path.exists():
+                    progress.update(task, description="Updating catalog data...")
+                    idx.index_catalog(cfg.catalog_path)
+                if cfg.run_results_path.exists():
+                    progress.update(task, description="Updating run results...")
+                    idx.index_run_results(cfg.run_results_path)
+
+            written: list[Path] = []
             if not skip_generate:
+                # generate_all() skips itself via its own stamp when nothing changed
                 progress.update(task, description="Updating context files...")
                 generator = ContextGenerator(idx.conn)
                 cfg_targets = cfg.generator.targets
-                generator.generate_all(cfg.dbt_project_root, targets=cfg_targets)
+                written = generator.generate_all(
+                    cfg.dbt_project_root, targets=cfg_targets, force=force
+                )
 
         progress.update(task, description="Sync complete!", completed=True)
 
+    if unchanged and not written:
+        console.print(
+            "[bold green]No changes since last sync.[/bold green] "
+            "manifest.json is unchanged; context files were left as-is."
+        )
+        return
     console.print("[bold green]Sync complete.[/bold green] Index and context files are up to date.")
 
 
@@ -212,6 +285,11 @@ def stats(
     project_root: Optional[Path] = typer.Argument(None),
 ) -> None:
     """Show index statistics for the current project."""
+    from rich.table import Table
+
+    from .indexer import open_connection
+    from .patterns import PatternExtractor
+
     cfg = load_config(project_root)
 
     if not cfg.absolute_index_path.exists():
@@ -220,11 +298,8 @@ def stats(
         )
         raise typer.Exit(1)
 
-    import sqlite3
-    conn = sqlite3.connect(str(cfg.absolute_index_path))
-    conn.row_factory = sqlite3.Row
-
-    from .patterns import PatternExtractor
+    conn = open_connection(cfg.absolute_index_path, readonly=True)
+    conn.row_factory = None  # get_stats() reads rows positionally
     extractor = PatternExtractor(conn)
     project_stats = extractor.get_stats()
 
@@ -256,8 +331,9 @@ def usage(
     Displays how the MCP server has been used: call counts by tool and intent,
     average token estimates, top queried models, and daily trends.
     """
-    import sqlite3 as _sqlite3
+    from rich.table import Table
 
+    from .indexer import open_connection
     from .usage import UsageLogger
 
     cfg = load_config(project_root)
@@ -268,8 +344,7 @@ def usage(
         )
         raise typer.Exit(1)
 
-    conn = _sqlite3.connect(str(cfg.absolute_index_path))
-    conn.row_factory = _sqlite3.Row
+    conn = open_connection(cfg.absolute_index_path, readonly=True)
     logger = UsageLogger(conn)
 
     if recent:
@@ -330,7 +405,7 @@ def usage(
         t = Table(title="Calls by tool", border_style="blue")
         t.add_column("Tool")
         t.add_column("Calls", justify="right")
-        for tool, count in sorted(s["by_tool"].items(), key=lambda x: -x[1]):
+        for tool, count in s["by_tool"].items():
             t.add_row(tool, str(count))
         console.print(t)
 
@@ -339,7 +414,7 @@ def usage(
         t = Table(title="Capsule calls by intent", border_style="blue")
         t.add_column("Intent")
         t.add_column("Calls", justify="right")
-        for intent, count in sorted(s["by_intent"].items(), key=lambda x: -x[1]):
+        for intent, count in s["by_intent"].items():
             t.add_row(intent, str(count))
         console.print(t)
 
@@ -354,11 +429,13 @@ def usage(
 
     # ── Daily calls ───────────────────────────────────────────────────────────
     if len(s["daily_calls"]) > 1:
-        t = Table(title="Daily calls", border_style="dim")
-        t.add_column("Date")
-        t.add_column("Calls", justify="right")
-        max_calls = max(r["calls"] for r in s["daily_calls"])
-        for row in s["daily_calls"]:
-            bar_len = round(row["calls"] / max_calls * 20) if max_calls else 0
-            t.add_row(row["date"], f"{'█' * bar_len} {row['calls']}")
-        console.print(t)
+        # Plain lines rather than a Table: a year-long window is 365 rows
+        # and the histogram needs no column layout.
+        counts = [r["calls"] for r in s["daily_calls"]]
+        max_calls = max(counts) or 1
+        console.print("[dim]Daily calls[/dim]")
+        console.print("\n".join(
+            # Integer scaling to a 20-char bar; no float division/rounding per row
+            f"  {row['date']}  {'█' * (c * 20 // max_calls)} {c}"
+            for row, c in zip(s["daily_calls"], counts)
+        ))
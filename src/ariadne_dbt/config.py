@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import copy
 import sys
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
 if sys.version_info >= (3, 11):
@@ -21,23 +23,18 @@ DEFAULT_TARGET_DIR = "target"
 DEFAULT_TOKEN_BUDGET = 10_000
 
 
-@dataclass
-class IntentDepth:
-    upstream: int = 1
-    downstream: int = 1
-
-
 @dataclass
 class CapsuleConfig:
     default_token_budget: int = DEFAULT_TOKEN_BUDGET
     max_pivots: int = 3
-    intent_depths: dict[str, IntentDepth] = field(default_factory=lambda: {
-        "debug":       IntentDepth(upstream=2, downstream=1),
-        "add_feature": IntentDepth(upstream=1, downstream=2),
-        "refactor":    IntentDepth(upstream=1, downstream=3),
-        "test":        IntentDepth(upstream=0, downstream=0),
-        "document":    IntentDepth(upstream=1, downstream=1),
-        "explore":     IntentDepth(upstream=1, downstream=1),
+    # intent -> (upstream depth, downstream depth)
+    intent_depths: dict[str, tuple[int, int]] = field(default_factory=lambda: {
+        "debug":       (2, 1),
+        "add_feature": (1, 2),
+        "refactor":    (1, 3),
+        "test":        (0, 0),
+        "document":    (1, 1),
+        "explore":     (1, 1),
     })
 
 
@@ -56,6 +53,13 @@ class GeneratorConfig:
     targets: list[str] = field(default_factory=lambda: ["claude_code"])
 
 
+@dataclass
+class IndexerConfig:
+    json_parser: str = "auto"  # "auto" (orjson if installed) | "orjson" | "json" | "ijson"
+    batch_size: int = 10_000  # rows per executemany() call while indexing
+    use_json_each: bool = False  # load macros/exposures/edges/catalog via SQLite json_each()
+
+
 @dataclass
 class EngineConfig:
     dbt_project_root: Path = field(default_factory=Path.cwd)
@@ -64,6 +68,7 @@ class EngineConfig:
     server: ServerConfig = field(default_factory=ServerConfig)
     capsule: CapsuleConfig = field(default_factory=CapsuleConfig)
     generator: GeneratorConfig = field(default_factory=GeneratorConfig)
+    indexer: IndexerConfig = field(default_factory=IndexerConfig)
 
     @property
     def manifest_path(self) -> Path:
@@ -89,9 +94,22 @@ def load_config(search_root: Path | None = None) -> EngineConfig:
     """Load configuration from TOML file, falling back to defaults.
 
     Searches for ariadne.toml in ``search_root`` (or cwd) and up to
-    the filesystem root.
+    the filesystem root. Parsed results are memoized per resolved search
+    root and each call returns its own copy; call ``clear_config_cache()``
+    after editing ariadne.toml in-process.
     """
-    start = Path(search_root or Path.cwd()).resolve()
+    return copy.deepcopy(_load_config_cached(str(Path(search_root or Path.cwd()).resolve())))
+
+
+def clear_config_cache() -> None:
+    """Forget memoized configs and dbt project roots."""
+    _load_config_cached.cache_clear()
+    _find_dbt_project_root.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def _load_config_cached(search_root: str) -> EngineConfig:
+    start = Path(search_root)
     config_path: Path | None = None
 
     candidate = start
@@ -116,12 +134,13 @@ def load_config(search_root: Path | None = None) -> EngineConfig:
     server_section = raw.get("server", {})
     capsule_section = raw.get("capsule", {})
     generator_section = raw.get("generator", {})
+    indexer_section = raw.get("indexer", {})
 
     # Intent depths
     intent_depths_raw = capsule_section.pop("intent_depths", {})
     default_depths = CapsuleConfig().intent_depths
     for intent, vals in intent_depths_raw.items():
-        default_depths[intent] = IntentDepth(**vals)
+        default_depths[intent] = (vals.get("upstream", 1), vals.get("downstream", 1))
 
     target_dir_str = project_section.get("target_dir", DEFAULT_TARGET_DIR)
     index_path_str = project_section.get("index_path", DEFAULT_INDEX_PATH)
@@ -144,11 +163,16 @@ def load_config(search_root: Path | None = None) -> EngineConfig:
             intent_depths=default_depths,
         ),
         generator=GeneratorConfig(**{k: v for k, v in generator_section.items()}),
+        indexer=IndexerConfig(**{k: v for k, v in indexer_section.items()}),
     )
 
 
+@lru_cache(maxsize=16)
 def _find_dbt_project_root(start: Path) -> Path:
-    """Walk up from ``start`` looking for dbt_project.yml."""
+    """Walk up from ``start`` looking for dbt_project.yml.
+
+    One ``stat()`` per ancestor, memoized per start directory.
+    """
     candidate = start.resolve()
     while True:
         if (candidate / "dbt_project.yml").exists():
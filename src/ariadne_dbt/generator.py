@@ -2,27 +2,79 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
 
 from jinja2 import Environment, FileSystemLoader, StrictUndefined
 
+from . import __version__
 from .models import ProjectPatterns, ProjectStats
 from .patterns import PatternExtractor
 
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
+STAMP_PATH = Path(".ariadne") / "generator.stamp"
+_RENDER_WORKERS = 4
+
+# (output path, template name, template context)
+_RenderJob = tuple[Path, str, dict[str, Any]]
+
+
+# Templates ship with the package and never change at runtime, so the
+# environment and compiled templates are shared by every ContextGenerator.
+_ENV = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    undefined=StrictUndefined,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
+)
+_TEMPLATES = {
+    name: _ENV.get_template(name)
+    for name in (
+        "claude_md.j2",
+        "skill_new_model.j2",
+        "skill_debug_test.j2",
+        "dag_summary.j2",
+        "cursor_rules.j2",
+    )
+}
 
+# Seeded once into .claude/memory.md; agents and users own it afterwards.
+_MEMORY_MD_TEMPLATE = """# Project Memory (auto-updated by ariadne)
+> Initialized: {today}
 
-def _jinja_env() -> Environment:
-    return Environment(
-        loader=FileSystemLoader(str(TEMPLATES_DIR)),
-        undefined=StrictUndefined,
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
+## Recent Changes
+<!-- ariadne will append entries here after significant sessions -->
+
+## Known Issues
+<!-- Add known data quality issues, source problems, or model gotchas here -->
+
+## Domain Knowledge
+<!-- Add project-specific business rules and definitions here -->
+<!-- Example: "Revenue" means net revenue (after refunds) -->
+
+## Agent Notes
+<!-- Persistent notes for AI agents about this project's conventions -->
+"""
+
+
+class KeyModel(NamedTuple):
+    """Row shape of ``_get_key_models``; templates read it by attribute."""
+    unique_id: str
+    name: str
+    layer: str
+    description: str
+    upstream_count: int
+    downstream_count: int
+    centrality: float
 
 
 class ContextGenerator:
@@ -31,7 +83,6 @@ class ContextGenerator:
     def __init__(self, conn: sqlite3.Connection) -> None:
         self._conn = conn
         self._extractor = PatternExtractor(conn)
-        self._env = _jinja_env()
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -39,104 +90,91 @@ class ContextGenerator:
         self,
         project_root: Path,
         targets: list[str] | None = None,
+        force: bool = False,
     ) -> list[Path]:
-        """Generate all context files. Returns list of written file paths."""
+        """Generate all context files. Returns list of written file paths.
+
+        Skipped (returns ``[]``) when the indexed manifest, targets and Ariadne
+        version match the last run recorded in ``.ariadne/generator.stamp`` and
+        its files are still present, unless ``force`` is set.
+        """
         targets = targets or ["claude_code"]
+        fingerprint = self._inputs_fingerprint(targets)
+        stamp_path = project_root / STAMP_PATH
+        if not force and fingerprint and _stamp_matches(stamp_path, project_root, fingerprint):
+            return []
+
         stats = self._extractor.get_stats()
         patterns = self._extractor.get_patterns()
         key_models = self._get_key_models()
         ctx = self._build_context(stats, patterns, key_models)
 
         written: list[Path] = []
+        jobs: list[_RenderJob] = []
 
         if "claude_code" in targets:
-            written += self._write_claude_files(project_root, ctx, stats, patterns)
+            jobs += self._claude_jobs(project_root, ctx)
+            # memory.md — only create if absent
+            memory_md = project_root / ".claude" / "memory.md"
+            if not memory_md.exists():
+                _write_file(memory_md, _initial_memory_md())
+                written.append(memory_md)
 
         if "cursor" in targets:
-            written += self._write_cursor_files(project_root, ctx)
+            jobs += self._cursor_jobs(project_root, ctx)
 
         if "windsurf" in targets:
-            written += self._write_windsurf_files(project_root, ctx)
+            jobs += self._windsurf_jobs(project_root, ctx)
+
+        # Rendering and writing are independent per file; DB reads all happen
+        # above on this thread, so workers never touch the connection.
+        with ThreadPoolExecutor(max_workers=_RENDER_WORKERS) as pool:
+            list(pool.map(self._render_and_write, jobs))
+        written += [path for path, _, _ in jobs]
 
+        if fingerprint:
+            _write_stamp(stamp_path, project_root, fingerprint, written)
         return written
 
-    # ── File writers ──────────────────────────────────────────────────────────
+    # ── File jobs ─────────────────────────────────────────────────────────────
 
-    def _write_claude_files(
-        self,
-        project_root: Path,
-        ctx: dict[str, Any],
-        stats: ProjectStats,
-        patterns: ProjectPatterns,
-    ) -> list[Path]:
+    def _claude_jobs(self, project_root: Path, ctx: dict[str, Any]) -> list[_RenderJob]:
         claude_dir = project_root / ".claude"
         skills_dir = claude_dir / "skills"
         context_dir = claude_dir / "context"
-        for d in (claude_dir, skills_dir, context_dir):
-            d.mkdir(parents=True, exist_ok=True)
-
-        written = []
-
-        # CLAUDE.md
-        claude_md = claude_dir / "CLAUDE.md"
-        rendered = self._render("claude_md.j2", ctx)
-        _write_file(claude_md, rendered)
-        written.append(claude_md)
-
-        # memory.md — only create if absent
-        memory_md = claude_dir / "memory.md"
-        if not memory_md.exists():
-            _write_file(memory_md, _initial_memory_md(stats.project_name))
-            written.append(memory_md)
 
-        # skills/new_model.md
         example_model = self._extractor.get_example_model("staging") or self._extractor.get_example_model("marts")
         example_yaml = self._extractor.get_example_test_yaml()
         skill_ctx = {**ctx, "example_model": example_model, "example_yaml": example_yaml}
-        rendered = self._render("skill_new_model.j2", skill_ctx)
-        _write_file(skills_dir / "new_model.md", rendered)
-        written.append(skills_dir / "new_model.md")
 
-        # skills/debug_test.md
-        rendered = self._render("skill_debug_test.j2", ctx)
-        _write_file(skills_dir / "debug_test.md", rendered)
-        written.append(skills_dir / "debug_test.md")
+        return [
+            (claude_dir / "CLAUDE.md", "claude_md.j2", ctx),
+            (skills_dir / "new_model.md", "skill_new_model.j2", skill_ctx),
+            (skills_dir / "debug_test.md", "skill_debug_test.j2", ctx),
+            (context_dir / "dag_summary.md", "dag_summary.j2", ctx),
+        ]
 
-        # context/dag_summary.md
-        rendered = self._render("dag_summary.j2", ctx)
-        _write_file(context_dir / "dag_summary.md", rendered)
-        written.append(context_dir / "dag_summary.md")
+    def _cursor_jobs(self, project_root: Path, ctx: dict[str, Any]) -> list[_RenderJob]:
+        return [(project_root / ".cursor" / "rules" / "ariadne.mdc", "cursor_rules.j2", ctx)]
 
-        return written
-
-    def _write_cursor_files(self, project_root: Path, ctx: dict[str, Any]) -> list[Path]:
-        cursor_dir = project_root / ".cursor" / "rules"
-        cursor_dir.mkdir(parents=True, exist_ok=True)
-        rules_file = cursor_dir / "ariadne.mdc"
-        rendered = self._render("cursor_rules.j2", ctx)
-        _write_file(rules_file, rendered)
-        return [rules_file]
-
-    def _write_windsurf_files(self, project_root: Path, ctx: dict[str, Any]) -> list[Path]:
-        windsurf_dir = project_root / ".windsurf" / "rules"
-        windsurf_dir.mkdir(parents=True, exist_ok=True)
-        rules_file = windsurf_dir / "ariadne.md"
+    def _windsurf_jobs(self, project_root: Path, ctx: dict[str, Any]) -> list[_RenderJob]:
         # Windsurf uses same format as Cursor rules (Markdown)
-        rendered = self._render("cursor_rules.j2", ctx)
-        _write_file(rules_file, rendered)
-        return [rules_file]
+        return [(project_root / ".windsurf" / "rules" / "ariadne.md", "cursor_rules.j2", ctx)]
 
     # ── Template rendering ────────────────────────────────────────────────────
 
     def _render(self, template_name: str, context: dict[str, Any]) -> str:
-        template = self._env.get_template(template_name)
-        return template.render(**context)
+        return _TEMPLATES[template_name].render(**context)
+
+    def _render_and_write(self, job: _RenderJob) -> None:
+        path, template_name, context = job
+        _write_file(path, self._render(template_name, context))
 
     def _build_context(
         self,
         stats: ProjectStats,
         patterns: ProjectPatterns,
-        key_models: list[dict[str, Any]],
+        key_models: list[KeyModel],
     ) -> dict[str, Any]:
         return {
             "stats": stats,
@@ -147,8 +185,20 @@ class ContextGenerator:
 
     # ── Data helpers ──────────────────────────────────────────────────────────
 
-    def _get_key_models(self, limit: int = 8) -> list[dict[str, Any]]:
-        rows = self._conn.execute(
+    def _inputs_fingerprint(self, targets: list[str]) -> str | None:
+        """Hash of everything the generated files depend on (None if unknown)."""
+        row = self._conn.execute(
+            "SELECT value FROM index_metadata WHERE key = 'manifest_hash'"
+        ).fetchone()
+        if not row:
+            return None
+        key = "\0".join([__version__, row[0], *sorted(targets)])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _get_key_models(self, limit: int = 8) -> list[KeyModel]:
+        cur = self._conn.cursor()
+        cur.row_factory = lambda _cur, row: KeyModel(*row)
+        return cur.execute(
             """
             SELECT unique_id, name, layer, description, upstream_count, downstream_count, centrality
             FROM models
@@ -157,31 +207,44 @@ class ContextGenerator:
             """,
             (limit,),
         ).fetchall()
-        return [dict(r) for r in rows]
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _write_file(path: Path, content: str) -> None:
+    data = content.encode("utf-8")
+    # Leave identical files untouched so editors/watchers don't see a change
+    if path.exists() and path.read_bytes() == data:
+        return
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-
-
-def _initial_memory_md(project_name: str) -> str:
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    return f"""# Project Memory (auto-updated by ariadne)
-> Initialized: {today}
+    # Write-then-rename so agents watching the file never see it half-written
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _stamp_matches(stamp_path: Path, project_root: Path, fingerprint: str) -> bool:
+    try:
+        stamp = json.loads(stamp_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return stamp.get("fingerprint") == fingerprint and all(
+        (project_root / f).exists() for f in stamp.get("files", [])
+    )
 
-## Recent Changes
-<!-- ariadne will append entries here after significant sessions -->
 
-## Known Issues
-<!-- Add known data quality issues, source problems, or model gotchas here -->
+def _write_stamp(
+    stamp_path: Path, project_root: Path, fingerprint: str, written: list[Path]
+) -> None:
+    stamp_path.parent.mkdir(parents=True, exist_ok=True)
+    files = [str(p.relative_to(project_root)) for p in written]
+    tmp = stamp_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"fingerprint": fingerprint, "files": files}), encoding="utf-8")
+    os.replace(tmp, stamp_path)
 
-## Domain Knowledge
-<!-- Add project-specific business rules and definitions here -->
-<!-- Example: "Revenue" means net revenue (after refunds) -->
 
-## Agent Notes
-<!-- Persistent notes for AI agents about this project's conventions -->
-"""
+def _initial_memory_md() -> str:
+    return _MEMORY_MD_TEMPLATE.format(today=datetime.now(timezone.utc).strftime("%Y-%m-%d"))
@@ -2,10 +2,60 @@
 
 from __future__ import annotations
 
+import json
 import sqlite3
-from collections import deque
+from collections import OrderedDict
 from typing import Any
 
+# Recursive walk over edges for each direction. UNION dedups (id, dist)
+# pairs, so the walk is bounded by nodes × depth even on diamond-heavy DAGs.
+_WALK_CTE = """
+    WITH RECURSIVE walk(id, dist) AS (
+        SELECT {select}, 1 FROM edges WHERE {match} = ?1
+        UNION
+        SELECT e.{select}, w.dist + 1
+        FROM edges e JOIN walk w ON e.{match} = w.id
+        WHERE w.dist < ?2
+    )
+"""
+_UP_CTE = _WALK_CTE.format(select="parent_id", match="child_id")
+_DOWN_CTE = _WALK_CTE.format(select="child_id", match="parent_id")
+
+# (unique_id, shortest distance) sorted by distance, id
+_WALK_SELECT = "SELECT id, MIN(dist) FROM walk WHERE id != ?1 GROUP BY id ORDER BY 2, 1"
+_WALK_SQL = {
+    "up": _UP_CTE + _WALK_SELECT,
+    "down": _DOWN_CTE + _WALK_SELECT,
+}
+
+# Downstream walk joined against models/tests/exposures in one statement;
+# the first column tags the row kind, the last is the reach distance.
+_IMPACT_SQL = _DOWN_CTE + """
+    , reach(id, dist) AS (
+        SELECT id, MIN(dist) FROM walk WHERE id != ?1 GROUP BY id
+    )
+    SELECT 'm', m.unique_id, m.name, m.layer, m.materialization, NULL, r.dist
+    FROM reach r JOIN models m ON m.unique_id = r.id
+    UNION ALL
+    SELECT 't', t.unique_id, t.name, t.test_type, t.model_id, t.column_name, r.dist
+    FROM reach r JOIN tests t ON t.model_id = r.id
+    UNION ALL
+    SELECT 'e', e.unique_id, e.name, e.type, e.url, NULL, r.dist
+    FROM reach r JOIN exposures e ON e.unique_id = r.id
+    ORDER BY 7, 2
+"""
+
+# Degree centrality normalised to [0, 1]; shared with the Indexer
+CENTRALITY_SQL = """
+    UPDATE models SET centrality = COALESCE(
+        CAST((upstream_count + downstream_count) AS REAL)
+        / NULLIF((SELECT MAX(upstream_count + downstream_count) FROM models), 0),
+        0.0
+    )
+"""
+
+_BFS_CACHE_SIZE = 1024
+
 
 class GraphOps:
     """All DAG operations backed by the SQLite edges table.
@@ -17,6 +67,22 @@ class GraphOps:
 
     def __init__(self, conn: sqlite3.Connection) -> None:
         self._conn = conn
+        # (start, direction, depth) → traversal, valid for one index generation
+        self._bfs_cache: OrderedDict[
+            tuple[str, str, int], tuple[tuple[str, int], ...]
+        ] = OrderedDict()
+        self._cache_generation: str | None = None
+        # limit → top rows by centrality, same generation as _bfs_cache
+        self._centrality_cache: dict[int, list[tuple[Any, ...]]] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self._conn
+
+    def clear_cache(self) -> None:
+        """Forget memoized traversals (they are also dropped on every reindex)."""
+        self._bfs_cache.clear()
+        self._centrality_cache.clear()
 
     # ── BFS traversal ─────────────────────────────────────────────────────────
 
@@ -42,37 +108,35 @@ class GraphOps:
     def _bfs(
         self, start: str, direction: str, depth: int
     ) -> list[tuple[str, int]]:
+        """Depth-limited walk in a single recursive CTE; shortest distance per node."""
         if depth <= 0:
             return []
 
-        visited: dict[str, int] = {}  # unique_id → distance
-        queue: deque[tuple[str, int]] = deque([(start, 0)])
-
-        while queue:
-            node_id, dist = queue.popleft()
-            if dist >= depth:
-                continue
-            next_dist = dist + 1
-
-            if direction == "up":
-                rows = self._conn.execute(
-                    "SELECT parent_id FROM edges WHERE child_id = ?", (node_id,)
-                ).fetchall()
-                neighbors = [r[0] for r in rows]
-            else:
-                rows = self._conn.execute(
-                    "SELECT child_id FROM edges WHERE parent_id = ?", (node_id,)
-                ).fetchall()
-                neighbors = [r[0] for r in rows]
+        self._sync_generation()
+        key = (start, direction, depth)
+        cached = self._bfs_cache.get(key)
+        if cached is None:
+            cur = self._tuple_cursor().execute(_WALK_SQL[direction], (start, depth))
+            cached = tuple(cur.fetchall())
+            self._bfs_cache[key] = cached
+            if len(self._bfs_cache) > _BFS_CACHE_SIZE:
+                self._bfs_cache.popitem(last=False)
+        else:
+            self._bfs_cache.move_to_end(key)
+        return list(cached)
 
-            for nid in neighbors:
-                if nid == start or nid in visited:
-                    continue
-                visited[nid] = next_dist
-                queue.append((nid, next_dist))
+    def _sync_generation(self) -> None:
+        # Memoized results are only valid for the index generation they saw
+        generation = self._get_generation()
+        if generation != self._cache_generation:
+            self.clear_cache()
+            self._cache_generation = generation
 
-        # Sort by distance then name for determinism
-        return sorted(visited.items(), key=lambda x: (x[1], x[0]))
+    def _get_generation(self) -> str | None:
+        row = self._conn.execute(
+            "SELECT value FROM index_metadata WHERE key = 'generation'"
+        ).fetchone()
+        return row[0] if row else None
 
     # ── Impact analysis ───────────────────────────────────────────────────────
 
@@ -81,34 +145,29 @@ class GraphOps:
 
         Returns a dict with affected models, tests, exposures, and risk level.
         """
-        downstream_nodes = self._bfs(unique_id, "down", depth=max_depth)
-        model_ids = [nid for nid, _ in downstream_nodes if nid.startswith("model.")]
-        exposure_ids = [nid for nid, _ in downstream_nodes if nid.startswith("exposure.")]
-
-        affected_models = []
-        for mid in model_ids:
-            row = self._conn.execute(
-                "SELECT name, layer, materialization FROM models WHERE unique_id = ?", (mid,)
-            ).fetchone()
-            if row:
-                affected_models.append({"unique_id": mid, "name": row[0], "layer": row[1], "materialization": row[2]})
-
-        affected_tests = self._conn.execute(
-            f"""
-            SELECT t.unique_id, t.name, t.test_type, t.model_id, t.column_name
-            FROM tests t
-            WHERE t.model_id IN ({','.join('?' * len(model_ids))})
-            """,
-            model_ids,
-        ).fetchall() if model_ids else []
-
-        affected_exposures = []
-        for eid in exposure_ids:
-            row = self._conn.execute(
-                "SELECT name, type, url FROM exposures WHERE unique_id = ?", (eid,)
-            ).fetchone()
-            if row:
-                affected_exposures.append({"unique_id": eid, "name": row[0], "type": row[1], "url": row[2]})
+        affected_models: list[dict[str, Any]] = []
+        affected_tests: list[dict[str, Any]] = []
+        affected_exposures: list[dict[str, Any]] = []
+        rows = (
+            self._tuple_cursor().execute(_IMPACT_SQL, (unique_id, max_depth)).fetchall()
+            if max_depth > 0 else []
+        )
+        for row in rows:
+            kind = row[0]
+            if kind == "m":
+                affected_models.append({
+                    "unique_id": row[1], "name": row[2], "layer": row[3],
+                    "materialization": row[4],
+                })
+            elif kind == "t":
+                affected_tests.append({
+                    "unique_id": row[1], "name": row[2], "test_type": row[3],
+                    "model_id": row[4], "column_name": row[5],
+                })
+            else:
+                affected_exposures.append({
+                    "unique_id": row[1], "name": row[2], "type": row[3], "url": row[4],
+                })
 
         # Risk level heuristic
         n_models = len(affected_models)
@@ -126,7 +185,7 @@ class GraphOps:
             "affected_model_count": n_models,
             "affected_models": affected_models,
             "affected_test_count": len(affected_tests),
-            "affected_tests": [dict(r) for r in affected_tests],
+            "affected_tests": affected_tests,
             "affected_exposures": affected_exposures,
             "risk_level": risk,
         }
@@ -139,31 +198,40 @@ class GraphOps:
         source_ids = [nid for nid, _ in upstream if nid.startswith("source.")]
         if not source_ids:
             return []
-        rows = self._conn.execute(
-            f"""
+        # ids travel as one JSON array: the SQL text is constant, so the
+        # prepared statement is reused and no variable limit applies
+        rows = self._tuple_cursor().execute(
+            """
             SELECT unique_id, name, source_name, schema_name, description
             FROM sources
-            WHERE unique_id IN ({','.join('?' * len(source_ids))})
+            WHERE unique_id IN (SELECT value FROM json_each(?))
             """,
-            source_ids,
+            (json.dumps(source_ids),),
         ).fetchall()
-        return [dict(r) for r in rows]
+        by_id = {r[0]: r for r in rows}
+        # IN (...) order follows the query plan; keep the lineage order instead
+        return [
+            {
+                "unique_id": r[0], "name": r[1], "source_name": r[2],
+                "schema_name": r[3], "description": r[4],
+            }
+            for sid in source_ids
+            if (r := by_id.get(sid)) is not None
+        ]
+
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        # Positional rows: skips sqlite3.Row construction on wide result sets
+        cur = self._conn.cursor()
+        cur.row_factory = None
+        return cur
 
     # ── Centrality recompute (called after indexing) ──────────────────────────
 
     def recompute_centrality(self) -> None:
         """Recompute degree centrality for all models and update the DB."""
-        max_row = self._conn.execute(
-            "SELECT MAX(upstream_count + downstream_count) FROM models"
-        ).fetchone()[0] or 1
-        self._conn.execute(
-            """
-            UPDATE models SET centrality =
-                CAST((upstream_count + downstream_count) AS REAL) / ?
-            """,
-            (max_row,),
-        )
+        self._conn.execute(CENTRALITY_SQL)
         self._conn.commit()
+        self._centrality_cache.clear()
 
     # ── Convenience: get model centrality ────────────────────────────────────
 
@@ -176,13 +244,23 @@ class GraphOps:
     # ── High-centrality models ────────────────────────────────────────────────
 
     def get_high_centrality_models(self, limit: int = 10) -> list[dict[str, Any]]:
-        rows = self._conn.execute(
-            """
-            SELECT unique_id, name, layer, description, upstream_count, downstream_count, centrality
-            FROM models
-            ORDER BY centrality DESC, downstream_count DESC
-            LIMIT ?
-            """,
-            (limit,),
-        ).fetchall()
-        return [dict(r) for r in rows]
+        self._sync_generation()
+        rows = self._centrality_cache.get(limit)
+        if rows is None:
+            rows = self._centrality_cache[limit] = self._tuple_cursor().execute(
+                """
+                SELECT unique_id, name, layer, description,
+                       upstream_count, downstream_count, centrality
+                FROM models
+                ORDER BY centrality DESC, downstream_count DESC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "unique_id": r[0], "name": r[1], "layer": r[2], "description": r[3],
+                "upstream_count": r[4], "downstream_count": r[5], "centrality": r[6],
+            }
+            for r in rows
+        ]
@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import sqlite3
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
+from .config import EngineConfig
+from .graph import CENTRALITY_SQL
 from .models import (
     ColumnInfo,
     ExposureNode,
@@ -16,6 +21,19 @@ from .models import (
     TestNode,
 )
 
+try:
+    import orjson
+except ImportError:  # optional: pip install ariadne-dbt[fast]
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ijson
+except ImportError:  # optional: pip install ariadne-dbt[stream]
+    ijson = None  # type: ignore[assignment]
+
+# "ijson" streams manifest.json section by section instead of loading it whole
+JSON_PARSERS = ("auto", "orjson", "json", "ijson")
+
 
 # ─── Layer detection ─────────────────────────────────────────────────────────
 
@@ -26,32 +44,219 @@ _LAYER_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# A keyword matches at the start of a candidate or right after a "/", i.e. at
+# the start of any "/"-separated segment; str.startswith takes the whole tuple.
+_LAYER_PREFIXES = [(layer, tuple(keywords)) for layer, keywords in _LAYER_KEYWORDS.items()]
+
+
 def _detect_layer(fqn: list[str], name: str, config: dict[str, Any]) -> str:
     tags = config.get("tags", []) or []
     path_parts = fqn[1:] if len(fqn) > 1 else []  # skip package name
-    candidates = [p.lower() for p in path_parts] + [name.lower()] + [t.lower() for t in tags]
-    for layer, keywords in _LAYER_KEYWORDS.items():
-        if any(c.startswith(kw) or ("/" + kw) in c or c == kw for c in candidates for kw in keywords):
-            return layer
+    segments = "/".join([*path_parts, name, *tags]).lower().split("/")
+    for layer, prefixes in _LAYER_PREFIXES:
+        for segment in segments:
+            if segment.startswith(prefixes):
+                return layer
     return "other"
 
 
+# ─── Connections ──────────────────────────────────────────────────────────────
+
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA mmap_size = 268435456",  # 256MB: reads come straight from the page cache
+    "PRAGMA cache_size = -65536",  # 64MB
+    "PRAGMA temp_store = MEMORY",
+)
+_READONLY_PRAGMAS = (
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA query_only = ON",
+)
+
+# Prepared-statement cache per connection (sqlite3 default: 128). Every query
+# uses constant SQL text (id lists are bound as one JSON array), so the hot
+# per-model lookups of a capsule build are prepared once per connection.
+_CACHED_STATEMENTS = 256
+
+
+def open_connection(
+    db_path: Path, *, readonly: bool = False, check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """Open the index database with Ariadne's standard pragmas.
+
+    ``readonly`` connections are opened with ``mode=ro`` and ``query_only`` so
+    pure readers (``ariadne stats``/``usage``) never take a write lock. They
+    skip the journal-mode pragmas, which a read-only handle cannot change.
+    """
+    if readonly:
+        conn = sqlite3.connect(
+            f"{db_path.resolve().as_uri()}?mode=ro", uri=True,
+            check_same_thread=check_same_thread, cached_statements=_CACHED_STATEMENTS,
+        )
+    else:
+        conn = sqlite3.connect(
+            str(db_path), check_same_thread=check_same_thread, cached_statements=_CACHED_STATEMENTS,
+        )
+    conn.row_factory = sqlite3.Row
+    for pragma in _READONLY_PRAGMAS if readonly else _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# ─── Artifact loading ─────────────────────────────────────────────────────────
+
+def _load_json(path: Path, parser: str = "auto") -> Any:
+    """Parse a dbt artifact; orjson parses large manifests 2-3x faster than json."""
+    if orjson is not None and parser != "json":
+        return orjson.loads(path.read_bytes())
+    with path.open() as f:
+        return json.load(f)
+
+
+def _stream_items(path: Path, key: str) -> Iterator[tuple[str, Any]]:
+    """Yield ``(key, value)`` pairs of one top-level manifest object via ijson."""
+    with path.open("rb") as f:
+        yield from ijson.kvitems(f, key, use_float=True)
+
+
+def _stream_value(path: Path, key: str) -> Any:
+    """Return one top-level manifest value via ijson (None when absent)."""
+    with path.open("rb") as f:
+        return next(ijson.items(f, key, use_float=True), None)
+
+
+# ─── Manifest fingerprint ─────────────────────────────────────────────────────
+
+_FINGERPRINT_SAMPLE = 64 * 1024
+
+# Bump whenever index_manifest() starts writing new tables or columns, so
+# 'ariadne sync' rebuilds indexes written by older versions.
+INDEX_FORMAT = 3
+
+
+def manifest_fingerprint(manifest_path: Path) -> str:
+    """Cheap content fingerprint: file size plus the first and last 64KB.
+
+    dbt rewrites ``metadata.generated_at`` near the top and ``parent_map``/
+    ``child_map`` at the end of the manifest, so sampling both ends catches
+    real changes without hashing hundreds of MB.
+    """
+    size = manifest_path.stat().st_size
+    h = hashlib.blake2b(f"{INDEX_FORMAT}:{size}".encode(), digest_size=16)
+    with manifest_path.open("rb") as f:
+        h.update(f.read(_FINGERPRINT_SAMPLE))
+        if size > _FINGERPRINT_SAMPLE:
+            f.seek(max(_FINGERPRINT_SAMPLE, size - _FINGERPRINT_SAMPLE))
+            h.update(f.read())
+    return h.hexdigest()
+
+
 # ─── Indexer class ────────────────────────────────────────────────────────────
 
+_EDGE_PARENT_PREFIXES = ("model.", "source.")
+_EDGE_CHILD_PREFIXES = ("model.", "source.", "exposure.", "test.")
+
+# Per-model list tables mirroring the models.tags / refs / sources JSON
+_MODEL_LIST_TABLES = ("model_tags", "model_refs", "model_sources")
+
+# Tables fully rewritten by index_manifest()
+_BULK_TABLES = (
+    "models", "columns", *_MODEL_LIST_TABLES,
+    "sources", "source_columns", "tests", "macros", "exposures", "edges",
+)
+
+# Foreign-key tables cleared before a reindex, children before parents so no
+# DELETE has to cascade row by row
+_FK_CLEAR_ORDER = (
+    "tests", "columns", *_MODEL_LIST_TABLES, "source_columns", "models", "sources",
+)
+
+
+# Mirrors _extract_stat for index_catalog() under use_json_each: each stat is
+# {"value": ...} or a bare value; numbers and digit strings become integers
+_RAW_STAT_SQL = """CASE json_type(n.value, '$.stats.{key}')
+    WHEN 'object' THEN json_extract(n.value, '$.stats.{key}.value')
+    ELSE json_extract(n.value, '$.stats.{key}') END AS {key}"""
+_INT_STAT_SQL = """CASE WHEN typeof({key}) IN ('integer', 'real') THEN CAST({key} AS INTEGER)
+    WHEN trim({key}) GLOB '[0-9]*' AND NOT trim({key}) GLOB '*[^0-9]*'
+    THEN CAST(trim({key}) AS INTEGER) END"""
+_CATALOG_MODELS_SQL = """
+    UPDATE models
+    SET row_count = c.row_count, bytes = c.bytes, last_modified = c.last_modified
+    FROM (
+        SELECT unique_id, last_modified,
+               coalesce({num_rows}, {row_count}) AS row_count,
+               coalesce({num_bytes}, {bytes}) AS bytes
+        FROM (
+            SELECT n.key AS unique_id,
+                   json_extract(n.value, '$.metadata.last_modified') AS last_modified,
+                   {raw}
+            FROM json_each(?, '$.nodes') AS n
+        )
+    ) AS c
+    WHERE models.unique_id = c.unique_id
+""".format(
+    raw=",\n                   ".join(
+        _RAW_STAT_SQL.format(key=k) for k in ("num_rows", "row_count", "num_bytes", "bytes")
+    ),
+    **{k: _INT_STAT_SQL.format(key=k) for k in ("num_rows", "row_count", "num_bytes", "bytes")},
+)
+
+
 class Indexer:
     """Parse dbt artifacts and populate the SQLite index."""
 
-    def __init__(self, db_path: Path) -> None:
+    def __init__(
+        self,
+        db_path: Path,
+        json_parser: str = "auto",
+        batch_size: int = 10_000,
+        use_json_each: bool = False,
+    ) -> None:
+        if json_parser not in JSON_PARSERS:
+            raise ValueError(f"json_parser must be one of {JSON_PARSERS}, got {json_parser!r}")
+        if json_parser == "orjson" and orjson is None:
+            raise ImportError(
+                "json_parser = 'orjson' requires orjson: pip install 'ariadne-dbt[fast]'"
+            )
+        if json_parser == "ijson" and ijson is None:
+            raise ImportError(
+                "json_parser = 'ijson' requires ijson: pip install 'ariadne-dbt[stream]'"
+            )
         self.db_path = db_path
+        self._json_parser = json_parser
+        self._batch_size = max(1, batch_size)
+        self._use_json_each = use_json_each
         db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(db_path))
-        self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA journal_mode = WAL")
-        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn = open_connection(db_path)
+        self._in_batch = False
         self._apply_schema()
 
+    @classmethod
+    def from_config(cls, config: EngineConfig) -> "Indexer":
+        """Open the index at ``config.absolute_index_path`` with its ``[indexer]`` settings."""
+        return cls(
+            config.absolute_index_path,
+            json_parser=config.indexer.json_parser,
+            batch_size=config.indexer.batch_size,
+            use_json_each=config.indexer.use_json_each,
+        )
+
     def close(self) -> None:
-        self._conn.close()
+        # Refresh planner statistics for tables the run changed but that
+        # _recreate_indexes does not ANALYZE (cheap when nothing is stale).
+        # Best effort: a busy database must not leak the connection or, in
+        # __exit__, replace the exception that ended the index run.
+        try:
+            self._conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        finally:
+            self._conn.close()
 
     def __enter__(self) -> "Indexer":
         return self
@@ -59,6 +264,31 @@ class Indexer:
     def __exit__(self, *args: Any) -> None:
         self.close()
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Run several ``index_*`` calls as one write transaction (a single commit).
+
+        Durability stays at ``synchronous = NORMAL``: the database also holds
+        ``usage_log`` (user ratings), which a rebuild from the dbt artifacts
+        cannot recreate. Under WAL that already means one fsync per commit,
+        not per statement.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._in_batch = True
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        else:
+            self._conn.commit()
+        finally:
+            self._in_batch = False
+
+    def _transaction(self) -> AbstractContextManager[Any]:
+        # Inside batch() the outer transaction owns the commit
+        return nullcontext() if self._in_batch else self.batch()
+
     # ── Schema ────────────────────────────────────────────────────────────────
 
     def _apply_schema(self) -> None:
@@ -71,100 +301,298 @@ class Indexer:
 
     def index_manifest(self, manifest_path: Path) -> None:
         """Parse manifest.json and populate all tables."""
-        with manifest_path.open() as f:
-            manifest = json.load(f)
-
-        self._store_metadata(manifest)
-        nodes: dict[str, Any] = manifest.get("nodes", {})
-        sources: dict[str, Any] = manifest.get("sources", {})
-        macros: dict[str, Any] = manifest.get("macros", {})
-        exposures: dict[str, Any] = manifest.get("exposures", {})
-        parent_map: dict[str, list[str]] = manifest.get("parent_map", {})
-        child_map: dict[str, list[str]] = manifest.get("child_map", {})
-
-        models, tests = self._parse_nodes(nodes)
-        source_nodes = self._parse_sources(sources)
-        macro_nodes = self._parse_macros(macros)
-        exposure_nodes = self._parse_exposures(exposures)
-
-        with self._conn:
+        manifest_text: str | None = None
+        manifest: dict[str, Any] | None = None
+        if self._use_json_each:
+            manifest_text = manifest_path.read_text()
+            manifest = self._extract_manifest_sections(manifest_text)
+        elif self._json_parser != "ijson":
+            manifest = _load_json(manifest_path, self._json_parser)
+        # manifest stays None under ijson: each section is streamed on demand
+
+        def section(key: str) -> Iterable[tuple[str, Any]]:
+            if manifest is None:
+                return _stream_items(manifest_path, key)
+            return (manifest.get(key) or {}).items()
+
+        models, tests = self._parse_nodes(section("nodes"))
+        source_nodes = self._parse_sources(section("sources"))
+        metadata = (
+            _stream_value(manifest_path, "metadata") if manifest is None
+            else manifest.get("metadata")
+        )
+
+        with self._transaction():
+            # FK checks run once at COMMIT instead of per inserted row;
+            # the pragma resets itself when the transaction ends
+            self._conn.execute("PRAGMA defer_foreign_keys = ON")
+            index_ddl = self._drop_bulk_indexes()
+            for table in _FK_CLEAR_ORDER:
+                self._conn.execute(f"DELETE FROM {table}")
+            self._store_metadata(metadata or {})
             self._insert_models(models)
             self._insert_sources(source_nodes)
             self._insert_tests(tests)
-            self._insert_macros(macro_nodes)
-            self._insert_exposures(exposure_nodes)
-            self._insert_edges(parent_map)
+            if manifest_text is None:
+                self._insert_macros(self._parse_macros(section("macros")))
+                self._insert_exposures(self._parse_exposures(section("exposures")))
+                self._insert_edges(section("parent_map"))
+            else:
+                self._insert_json_each(manifest_text)
+            self._recreate_indexes(index_ddl)
             self._update_degree_counts()
-            self._populate_fts(models)
+            self._populate_fts()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_metadata (key, value) VALUES ('manifest_hash', ?)",
+                (manifest_fingerprint(manifest_path),),
+            )
+            self._bump_generation()
+
+    def get_metadata(self, key: str) -> str | None:
+        """Return a value from ``index_metadata`` (None when absent)."""
+        row = self._conn.execute(
+            "SELECT value FROM index_metadata WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def manifest_unchanged(self, manifest_path: Path) -> bool:
+        """True when ``manifest_path`` matches the fingerprint of the last index run."""
+        return self.get_metadata("manifest_hash") == manifest_fingerprint(manifest_path)
 
     def index_catalog(self, catalog_path: Path) -> None:
         """Parse catalog.json and enrich model rows with warehouse stats."""
         if not catalog_path.exists():
             return
-        with catalog_path.open() as f:
-            catalog = json.load(f)
+        if self._use_json_each:
+            with self._transaction():
+                self._apply_catalog_json_each(catalog_path.read_text())
+                self._bump_generation()
+            return
+        catalog = _load_json(catalog_path, self._json_parser)
 
         nodes: dict[str, Any] = catalog.get("nodes", {})
-        with self._conn:
-            for unique_id, node in nodes.items():
-                meta = node.get("metadata", {})
-                stats_raw = node.get("stats", {})
-                row_count = self._extract_stat(stats_raw, "num_rows", "row_count")
-                bytes_val = self._extract_stat(stats_raw, "num_bytes", "bytes")
-                last_modified = meta.get("last_modified")
-
-                # Enrich columns with catalog types
-                catalog_cols: dict[str, Any] = node.get("columns", {})
-                for col_name, col_data in catalog_cols.items():
-                    self._conn.execute(
-                        """
-                        UPDATE columns SET data_type = ?
-                        WHERE model_id = ? AND lower(name) = lower(?)
-                        """,
-                        (col_data.get("type", ""), unique_id, col_name),
-                    )
+        column_rows: list[tuple[Any, ...]] = []
+        model_rows: list[tuple[Any, ...]] = []
+        for unique_id, node in nodes.items():
+            meta = node.get("metadata", {})
+            stats_raw = node.get("stats", {})
+            row_count = self._extract_stat(stats_raw, "num_rows", "row_count")
+            bytes_val = self._extract_stat(stats_raw, "num_bytes", "bytes")
+            # Enrich columns with catalog types
+            catalog_cols: dict[str, Any] = node.get("columns", {})
+            column_rows.extend(
+                (col_data.get("type", ""), unique_id, col_name)
+                for col_name, col_data in catalog_cols.items()
+            )
+            model_rows.append((row_count, bytes_val, meta.get("last_modified"), unique_id))
 
+        with self._transaction():
+            # Stage the catalog in temp tables, then apply it with one joined
+            # UPDATE per table (UPDATE ... FROM, SQLite >= 3.33).
+            self._conn.execute(
+                "CREATE TEMP TABLE _catalog_columns (data_type TEXT, model_id TEXT, name TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TEMP TABLE _catalog_models (row_count INTEGER, bytes INTEGER,"
+                " last_modified TEXT, unique_id TEXT PRIMARY KEY)"
+            )
+            try:
+                self._executemany_batched(
+                    "INSERT INTO _catalog_columns VALUES (?,?,?)", column_rows
+                )
+                self._executemany_batched(
+                    "INSERT OR REPLACE INTO _catalog_models VALUES (?,?,?,?)", model_rows
+                )
+                self._conn.execute(
+                    """
+                    UPDATE columns SET data_type = c.data_type
+                    FROM _catalog_columns c
+                    WHERE columns.model_id = c.model_id AND lower(columns.name) = lower(c.name)
+                    """
+                )
                 self._conn.execute(
                     """
                     UPDATE models
-                    SET row_count = ?, bytes = ?, last_modified = ?
-                    WHERE unique_id = ?
-                    """,
-                    (row_count, bytes_val, last_modified, unique_id),
+                    SET row_count = c.row_count, bytes = c.bytes, last_modified = c.last_modified
+                    FROM _catalog_models c
+                    WHERE models.unique_id = c.unique_id
+                    """
                 )
+            finally:
+                self._conn.execute("DROP TABLE temp._catalog_columns")
+                self._conn.execute("DROP TABLE temp._catalog_models")
+            self._bump_generation()
 
     def index_run_results(self, run_results_path: Path) -> None:
         """Parse run_results.json and update test statuses."""
         if not run_results_path.exists():
             return
-        with run_results_path.open() as f:
-            run_results = json.load(f)
+        run_results = _load_json(run_results_path, self._json_parser)
 
         results: list[dict[str, Any]] = run_results.get("results", [])
-        with self._conn:
-            for result in results:
-                unique_id: str = result.get("unique_id", "")
-                if not unique_id.startswith("test."):
-                    continue
-                status = result.get("status", "")
-                timing = result.get("timing", [])
-                exec_time = sum(t.get("completed_at", 0) - t.get("started_at", 0) for t in timing if isinstance(t, dict))
-                failures = result.get("failures", 0) or 0
+        rows: list[tuple[Any, ...]] = []
+        for result in results:
+            unique_id: str = result.get("unique_id", "")
+            if not unique_id.startswith("test."):
+                continue
+            status = result.get("status", "")
+            timing = result.get("timing", [])
+            exec_time = sum(
+                t.get("completed_at", 0) - t.get("started_at", 0)
+                for t in timing if isinstance(t, dict)
+            )
+            failures = result.get("failures", 0) or 0
+            rows.append((status, exec_time if exec_time > 0 else None, failures, unique_id))
+
+        with self._transaction():
+            # Same staging pattern as index_catalog(): temp table + one UPDATE ... FROM
+            self._conn.execute(
+                "CREATE TEMP TABLE _run_results"
+                " (status TEXT, exec_time REAL, failures INTEGER, unique_id TEXT PRIMARY KEY)"
+            )
+            try:
+                self._executemany_batched(
+                    "INSERT OR REPLACE INTO _run_results VALUES (?,?,?,?)", rows
+                )
                 self._conn.execute(
                     """
                     UPDATE tests
-                    SET last_status = ?, last_execution_time = ?, last_failures = ?
-                    WHERE unique_id = ?
-                    """,
-                    (status, exec_time if exec_time > 0 else None, failures, unique_id),
+                    SET last_status = r.status, last_execution_time = r.exec_time,
+                        last_failures = r.failures
+                    FROM _run_results r
+                    WHERE tests.unique_id = r.unique_id
+                    """
                 )
+            finally:
+                self._conn.execute("DROP TABLE temp._run_results")
+            self._bump_generation()
+
+    def _bump_generation(self) -> None:
+        """Advance the index generation so readers can drop memoized results."""
+        self._conn.execute(
+            """
+            INSERT INTO index_metadata (key, value) VALUES ('generation', '1')
+            ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+            """
+        )
+
+    # ── Bulk-load index management ────────────────────────────────────────────
+
+    def _drop_bulk_indexes(self) -> list[str]:
+        """Drop secondary indexes on the reloaded tables; return their DDL.
+
+        Building each B-tree once from the full table beats maintaining it
+        row by row. PK/UNIQUE autoindexes (``sql IS NULL``) stay, since
+        ``INSERT OR IGNORE`` relies on them.
+        """
+        rows = self._conn.execute(
+            f"""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL
+              AND tbl_name IN ({','.join('?' * len(_BULK_TABLES))})
+            """,
+            _BULK_TABLES,
+        ).fetchall()
+        for name, _ in rows:
+            self._conn.execute(f'DROP INDEX "{name}"')
+        return [sql for _, sql in rows]
+
+    def _recreate_indexes(self, ddl: list[str]) -> None:
+        for sql in ddl:
+            self._conn.execute(sql)
+        # Refresh planner statistics for the freshly loaded tables
+        for table in _BULK_TABLES:
+            self._conn.execute(f"ANALYZE {table}")
+
+    # ── json_each loading ─────────────────────────────────────────────────────
+
+    def _extract_manifest_sections(self, manifest_text: str) -> dict[str, Any]:
+        """Let SQLite pull out the sections that still need Python-side parsing.
+
+        Models, tests and sources go through ``_detect_layer`` and ref
+        normalisation, so only those (plus metadata) are materialised as
+        Python objects; macros, exposures and the parent map are left to
+        ``_insert_json_each``.
+        """
+        raw = self._conn.execute(
+            "SELECT json_extract(?, '$.nodes', '$.sources', '$.metadata')",
+            (manifest_text,),
+        ).fetchone()[0]
+        nodes, sources, metadata = json.loads(raw)
+        return {"nodes": nodes, "sources": sources, "metadata": metadata or {}}
+
+    def _insert_json_each(self, manifest_text: str) -> None:
+        """Insert macros, exposures and edges straight from the manifest text."""
+        self._conn.execute("DELETE FROM macros")
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO macros (
+                unique_id, name, package_name, file_path, description,
+                arguments, macro_sql
+            )
+            SELECT m.key,
+                   coalesce(json_extract(m.value, '$.name'), ''),
+                   coalesce(json_extract(m.value, '$.package_name'), ''),
+                   coalesce(json_extract(m.value, '$.original_file_path'), ''),
+                   coalesce(json_extract(m.value, '$.description'), ''),
+                   coalesce(json_extract(m.value, '$.arguments'), '[]'),
+                   coalesce(json_extract(m.value, '$.macro_sql'), '')
+            FROM json_each(?, '$.macros') AS m
+            """,
+            (manifest_text,),
+        )
+        self._conn.execute("DELETE FROM exposures")
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO exposures (
+                unique_id, name, label, type, url, description,
+                owner_name, owner_email, depends_on, tags
+            )
+            SELECT e.key,
+                   coalesce(json_extract(e.value, '$.name'), ''),
+                   coalesce(json_extract(e.value, '$.label'), ''),
+                   coalesce(json_extract(e.value, '$.type'), ''),
+                   coalesce(json_extract(e.value, '$.url'), ''),
+                   coalesce(json_extract(e.value, '$.description'), ''),
+                   coalesce(json_extract(e.value, '$.owner.name'), ''),
+                   coalesce(json_extract(e.value, '$.owner.email'), ''),
+                   coalesce(json_extract(e.value, '$.depends_on.nodes'), '[]'),
+                   coalesce(json_extract(e.value, '$.tags'), '[]')
+            FROM json_each(?, '$.exposures') AS e
+            """,
+            (manifest_text,),
+        )
+        # Same edge filter as _insert_edges (_EDGE_*_PREFIXES)
+        self._conn.execute("DELETE FROM edges")
+        self._conn.execute(
+            """
+            INSERT OR IGNORE INTO edges (parent_id, child_id)
+            SELECT p.value, c.key
+            FROM json_each(?, '$.parent_map') AS c, json_each(c.value) AS p
+            WHERE (p.value GLOB 'model.*' OR p.value GLOB 'source.*')
+              AND (c.key GLOB 'model.*' OR c.key GLOB 'source.*'
+                   OR c.key GLOB 'exposure.*' OR c.key GLOB 'test.*')
+            """,
+            (manifest_text,),
+        )
+
+    def _apply_catalog_json_each(self, catalog_text: str) -> None:
+        """index_catalog() without Python-side parsing: UPDATE straight from the text."""
+        self._conn.execute(
+            """
+            UPDATE columns SET data_type = coalesce(json_extract(c.value, '$.type'), '')
+            FROM json_each(?, '$.nodes') AS n, json_each(n.value, '$.columns') AS c
+            WHERE columns.model_id = n.key AND lower(columns.name) = lower(c.key)
+            """,
+            (catalog_text,),
+        )
+        self._conn.execute(_CATALOG_MODELS_SQL, (catalog_text,))
 
     # ── Parsing helpers ───────────────────────────────────────────────────────
 
-    def _store_metadata(self, manifest: dict[str, Any]) -> None:
-        meta: dict[str, Any] = manifest.get("metadata", {})
+    def _store_metadata(self, meta: dict[str, Any]) -> None:
         rows = [
-            ("dbt_schema_version", str(manifest.get("metadata", {}).get("dbt_schema_version", ""))),
+            ("dbt_schema_version", str(meta.get("dbt_schema_version", ""))),
             ("dbt_version", str(meta.get("dbt_version", ""))),
             ("adapter_type", str(meta.get("adapter_type", ""))),
             ("project_name", str(meta.get("project_name", ""))),
@@ -173,14 +601,13 @@ class Indexer:
         self._conn.executemany(
             "INSERT OR REPLACE INTO index_metadata (key, value) VALUES (?, ?)", rows
         )
-        self._conn.commit()
 
     def _parse_nodes(
-        self, nodes: dict[str, Any]
+        self, nodes: Iterable[tuple[str, Any]]
     ) -> tuple[list[ModelNode], list[TestNode]]:
         models: list[ModelNode] = []
         tests: list[TestNode] = []
-        for uid, node in nodes.items():
+        for uid, node in nodes:
             resource_type = node.get("resource_type", "")
             if resource_type == "model":
                 models.append(self._node_to_model(uid, node))
@@ -259,9 +686,9 @@ class Indexer:
             severity=node.get("config", {}).get("severity", "error"),
         )
 
-    def _parse_sources(self, sources: dict[str, Any]) -> list[SourceNode]:
+    def _parse_sources(self, sources: Iterable[tuple[str, Any]]) -> list[SourceNode]:
         result = []
-        for uid, src in sources.items():
+        for uid, src in sources:
             cols_raw: dict[str, Any] = src.get("columns", {})
             columns = [
                 ColumnInfo(
@@ -288,9 +715,9 @@ class Indexer:
             ))
         return result
 
-    def _parse_macros(self, macros: dict[str, Any]) -> list[MacroNode]:
+    def _parse_macros(self, macros: Iterable[tuple[str, Any]]) -> list[MacroNode]:
         result = []
-        for uid, macro in macros.items():
+        for uid, macro in macros:
             result.append(MacroNode(
                 unique_id=uid,
                 name=macro.get("name", ""),
@@ -302,9 +729,9 @@ class Indexer:
             ))
         return result
 
-    def _parse_exposures(self, exposures: dict[str, Any]) -> list[ExposureNode]:
+    def _parse_exposures(self, exposures: Iterable[tuple[str, Any]]) -> list[ExposureNode]:
         result = []
-        for uid, exp in exposures.items():
+        for uid, exp in exposures:
             owner: dict[str, Any] = exp.get("owner", {})
             result.append(ExposureNode(
                 unique_id=uid,
@@ -323,17 +750,16 @@ class Indexer:
     # ── Insertion helpers ─────────────────────────────────────────────────────
 
     def _insert_models(self, models: list[ModelNode]) -> None:
-        self._conn.execute("DELETE FROM models")
-        for m in models:
-            self._conn.execute(
-                """
-                INSERT OR REPLACE INTO models (
-                    unique_id, name, fqn, package_name, database, db_schema,
-                    alias, file_path, raw_code, compiled_code, language, description,
-                    layer, materialization, tags, meta, config,
-                    depends_on_nodes, refs, sources
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-                """,
+        self._executemany_batched(
+            """
+            INSERT OR REPLACE INTO models (
+                unique_id, name, fqn, package_name, database, db_schema,
+                alias, file_path, raw_code, compiled_code, language, description,
+                layer, materialization, tags, meta, config,
+                depends_on_nodes, refs, sources
+            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
                 (
                     m.unique_id, m.name, json.dumps(m.fqn), m.package_name,
                     m.database, m.db_schema, m.alias, m.file_path,
@@ -341,64 +767,88 @@ class Indexer:
                     m.layer, m.materialization,
                     json.dumps(m.tags), json.dumps(m.meta), json.dumps(m.config),
                     json.dumps(m.depends_on_nodes), json.dumps(m.refs), json.dumps(m.sources),
-                ),
-            )
-            # Columns
-            for col in m.columns:
-                self._conn.execute(
-                    """
-                    INSERT OR IGNORE INTO columns
-                        (model_id, name, data_type, description, meta, tags)
-                    VALUES (?,?,?,?,?,?)
-                    """,
-                    (m.unique_id, col.name, col.data_type, col.description,
-                     json.dumps(col.meta), json.dumps(col.tags)),
                 )
+                for m in models
+            ),
+        )
+        # Columns (after all models, so every FK target exists)
+        self._executemany_batched(
+            """
+            INSERT OR IGNORE INTO columns
+                (model_id, name, data_type, description, meta, tags)
+            VALUES (?,?,?,?,?,?)
+            """,
+            (
+                (m.unique_id, col.name, col.data_type, col.description,
+                 json.dumps(col.meta), json.dumps(col.tags))
+                for m in models
+                for col in m.columns
+            ),
+        )
+        # Normalised tag / ref / source lists (deduped, first-seen order)
+        self._executemany_batched(
+            "INSERT INTO model_tags (model_id, tag) VALUES (?,?)",
+            ((m.unique_id, t) for m in models for t in dict.fromkeys(m.tags)),
+        )
+        self._executemany_batched(
+            "INSERT INTO model_refs (model_id, ref_name) VALUES (?,?)",
+            ((m.unique_id, r) for m in models for r in dict.fromkeys(m.refs)),
+        )
+        self._executemany_batched(
+            "INSERT INTO model_sources (model_id, source_name) VALUES (?,?)",
+            ((m.unique_id, src) for m in models for src in dict.fromkeys(m.sources)),
+        )
 
     def _insert_sources(self, sources: list[SourceNode]) -> None:
-        self._conn.execute("DELETE FROM sources")
-        for s in sources:
-            self._conn.execute(
-                """
-                INSERT OR REPLACE INTO sources (
-                    unique_id, name, source_name, schema_name, database,
-                    description, loader, freshness_warn, freshness_error, tags, meta
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?)
-                """,
+        self._executemany_batched(
+            """
+            INSERT OR REPLACE INTO sources (
+                unique_id, name, source_name, schema_name, database,
+                description, loader, freshness_warn, freshness_error, tags, meta
+            ) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
                 (
                     s.unique_id, s.name, s.source_name, s.schema_name, s.database,
                     s.description, s.loader,
                     json.dumps(s.freshness_warn), json.dumps(s.freshness_error),
                     json.dumps(s.tags), json.dumps(s.meta),
-                ),
-            )
-            for col in s.columns:
-                self._conn.execute(
-                    """
-                    INSERT OR IGNORE INTO source_columns
-                        (source_id, name, data_type, description)
-                    VALUES (?,?,?,?)
-                    """,
-                    (s.unique_id, col.name, col.data_type, col.description),
                 )
+                for s in sources
+            ),
+        )
+        self._executemany_batched(
+            """
+            INSERT OR IGNORE INTO source_columns
+                (source_id, name, data_type, description)
+            VALUES (?,?,?,?)
+            """,
+            (
+                (s.unique_id, col.name, col.data_type, col.description)
+                for s in sources
+                for col in s.columns
+            ),
+        )
 
     def _insert_tests(self, tests: list[TestNode]) -> None:
-        self._conn.execute("DELETE FROM tests")
-        for t in tests:
-            self._conn.execute(
-                """
-                INSERT OR REPLACE INTO tests (
-                    unique_id, name, test_type, model_id, column_name,
-                    depends_on, severity
-                ) VALUES (?,?,?,?,?,?,?)
-                """,
+        self._executemany_batched(
+            """
+            INSERT OR REPLACE INTO tests (
+                unique_id, name, test_type, model_id, column_name,
+                depends_on, severity
+            ) VALUES (?,?,?,?,?,?,?)
+            """,
+            (
                 (
                     t.unique_id, t.name, t.test_type, t.model_id, t.column_name,
                     json.dumps(t.depends_on), t.severity,
-                ),
-            )
-        # Mark is_primary_key / is_foreign_key on columns
-        self._conn.executescript("""
+                )
+                for t in tests
+            ),
+        )
+        # Mark is_primary_key / is_foreign_key on columns. Individual execute()
+        # calls, not executescript(), which would commit the open transaction.
+        self._conn.execute("""
             UPDATE columns SET is_primary_key = 1
             WHERE rowid IN (
                 SELECT c.rowid FROM columns c
@@ -406,83 +856,102 @@ class Indexer:
                 WHERE t.test_type IN ('unique', 'not_null')
                 GROUP BY c.model_id, c.name
                 HAVING COUNT(DISTINCT t.test_type) >= 2
-            );
-
+            )
+        """)
+        self._conn.execute("""
             UPDATE columns SET is_foreign_key = 1
             WHERE rowid IN (
                 SELECT c.rowid FROM columns c
                 JOIN tests t ON t.model_id = c.model_id AND t.column_name = c.name
                 WHERE t.test_type = 'relationships'
-            );
+            )
         """)
 
     def _insert_macros(self, macros: list[MacroNode]) -> None:
         self._conn.execute("DELETE FROM macros")
-        for m in macros:
-            self._conn.execute(
-                """
-                INSERT OR REPLACE INTO macros (
-                    unique_id, name, package_name, file_path, description,
-                    arguments, macro_sql
-                ) VALUES (?,?,?,?,?,?,?)
-                """,
+        self._executemany_batched(
+            """
+            INSERT OR REPLACE INTO macros (
+                unique_id, name, package_name, file_path, description,
+                arguments, macro_sql
+            ) VALUES (?,?,?,?,?,?,?)
+            """,
+            (
                 (m.unique_id, m.name, m.package_name, m.file_path, m.description,
-                 json.dumps(m.arguments), m.macro_sql),
-            )
+                 json.dumps(m.arguments), m.macro_sql)
+                for m in macros
+            ),
+        )
 
     def _insert_exposures(self, exposures: list[ExposureNode]) -> None:
         self._conn.execute("DELETE FROM exposures")
-        for e in exposures:
-            self._conn.execute(
-                """
-                INSERT OR REPLACE INTO exposures (
-                    unique_id, name, label, type, url, description,
-                    owner_name, owner_email, depends_on, tags
-                ) VALUES (?,?,?,?,?,?,?,?,?,?)
-                """,
+        self._executemany_batched(
+            """
+            INSERT OR REPLACE INTO exposures (
+                unique_id, name, label, type, url, description,
+                owner_name, owner_email, depends_on, tags
+            ) VALUES (?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
                 (e.unique_id, e.name, e.label, e.type, e.url, e.description,
-                 e.owner_name, e.owner_email, json.dumps(e.depends_on), json.dumps(e.tags)),
-            )
+                 e.owner_name, e.owner_email, json.dumps(e.depends_on), json.dumps(e.tags))
+                for e in exposures
+            ),
+        )
 
-    def _insert_edges(self, parent_map: dict[str, list[str]]) -> None:
-        """Build edges table from parent_map (child_id → [parent_ids])."""
+    def _insert_edges(self, parent_map: Iterable[tuple[str, list[str]]]) -> None:
+        """Build edges table from parent_map items (child_id, [parent_ids])."""
         self._conn.execute("DELETE FROM edges")
-        rows = []
-        for child_id, parents in parent_map.items():
-            for parent_id in parents:
-                # Only include model-to-model, model-to-source, source-to-model edges
-                if parent_id.startswith(("model.", "source.")) and child_id.startswith(("model.", "source.", "exposure.", "test.")):
-                    rows.append((parent_id, child_id))
-        self._conn.executemany("INSERT OR IGNORE INTO edges (parent_id, child_id) VALUES (?,?)", rows)
+        # Only model/source parents, and model/source/exposure/test children.
+        # Deduped here, so the insert needs no OR IGNORE probe per row.
+        edges = {
+            (parent_id, child_id)
+            for child_id, parents in parent_map
+            if child_id.startswith(_EDGE_CHILD_PREFIXES)
+            for parent_id in parents
+            if parent_id.startswith(_EDGE_PARENT_PREFIXES)
+        }
+        self._executemany_batched("INSERT INTO edges (parent_id, child_id) VALUES (?,?)", edges)
 
     def _update_degree_counts(self) -> None:
-        self._conn.executescript("""
-            UPDATE models SET upstream_count = (
-                SELECT COUNT(*) FROM edges WHERE child_id = models.unique_id
-            );
-            UPDATE models SET downstream_count = (
-                SELECT COUNT(*) FROM edges WHERE parent_id = models.unique_id
-            );
-            UPDATE models SET centrality = CAST(
-                (upstream_count + downstream_count) AS REAL
-            ) / NULLIF((SELECT MAX(upstream_count + downstream_count) FROM models), 0);
+        # Two GROUP BY passes over edges instead of a correlated COUNT per model.
+        # Models without edges keep the 0 defaults they were just inserted with.
+        self._conn.execute("""
+            WITH degree(id, up, down) AS (
+                SELECT child_id, COUNT(*), 0 FROM edges GROUP BY child_id
+                UNION ALL
+                SELECT parent_id, 0, COUNT(*) FROM edges GROUP BY parent_id
+            )
+            UPDATE models SET upstream_count = d.up, downstream_count = d.down
+            FROM (SELECT id, SUM(up) AS up, SUM(down) AS down FROM degree GROUP BY id) AS d
+            WHERE d.id = models.unique_id
         """)
+        self._conn.execute(CENTRALITY_SQL)
 
-    def _populate_fts(self, models: list[ModelNode]) -> None:
+    def _populate_fts(self) -> None:
+        # Built from the rows just inserted, entirely inside SQLite
         self._conn.execute("DELETE FROM search_index")
-        for m in models:
-            col_names = " ".join(c.name for c in m.columns)
-            # Truncate SQL to avoid bloating FTS index
-            sql_snippet = (m.compiled_code or m.raw_code)[:2000]
-            self._conn.execute(
-                """
-                INSERT INTO search_index
-                    (unique_id, name, description, column_names, sql_text, tags)
-                VALUES (?,?,?,?,?,?)
-                """,
-                (m.unique_id, m.name, m.description, col_names,
-                 sql_snippet, " ".join(m.tags)),
-            )
+        self._conn.execute("""
+            INSERT INTO search_index
+                (unique_id, name, description, column_names, sql_text, tags)
+            SELECT
+                m.unique_id, m.name, m.description,
+                COALESCE((SELECT group_concat(c.name, ' ') FROM columns c
+                          WHERE c.model_id = m.unique_id), ''),
+                -- Truncate SQL to avoid bloating FTS index
+                substr(COALESCE(NULLIF(m.compiled_code, ''), m.raw_code, ''), 1, 2000),
+                COALESCE((SELECT group_concat(t.tag, ' ') FROM model_tags t
+                          WHERE t.model_id = m.unique_id), '')
+            FROM models m
+        """)
+        # External-content table: re-read file paths from the new model rowids
+        self._conn.execute("INSERT INTO path_index (path_index) VALUES ('rebuild')")
+
+    def _executemany_batched(self, sql: str, rows: Iterable[tuple[Any, ...]]) -> None:
+        """executemany() in chunks of ``batch_size`` rows to bound parameter buffers."""
+        it = iter(rows)
+        while batch := list(islice(it, self._batch_size)):
+            self._conn.executemany(sql, batch)
 
     # ── Stats helpers ─────────────────────────────────────────────────────────
 
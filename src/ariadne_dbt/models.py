@@ -1,8 +1,15 @@
-"""Pydantic data models for dbt Context Engine."""
+"""Data models for dbt Context Engine.
+
+Parsed dbt nodes are pydantic models; search results, capsule output and
+project statistics are plain slotted dataclasses, built only from trusted
+index rows and never validated.
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import Any
+
 from pydantic import BaseModel, Field
 
 
@@ -108,7 +115,8 @@ class ExposureNode(BaseModel):
 # ─── Search results ───────────────────────────────────────────────────────────
 
 
-class SearchResult(BaseModel):
+@dataclass(slots=True)
+class SearchResult:
     unique_id: str
     name: str
     layer: str
@@ -123,14 +131,16 @@ class SearchResult(BaseModel):
 # ─── Capsule output ───────────────────────────────────────────────────────────
 
 
-class SkeletonColumn(BaseModel):
+@dataclass(slots=True)
+class SkeletonColumn:
     name: str
     data_type: str = ""
     description: str = ""
-    tests: list[str] = Field(default_factory=list)
+    tests: list[str] = field(default_factory=list)
 
 
-class FullModelContext(BaseModel):
+@dataclass(slots=True)
+class FullModelContext:
     """PIVOT level — full detail."""
     unique_id: str
     name: str
@@ -140,11 +150,12 @@ class FullModelContext(BaseModel):
     compiled_sql: str
     description: str
     columns: list[SkeletonColumn]
-    tags: list[str] = Field(default_factory=list)
-    depends_on: list[str] = Field(default_factory=list)
+    tags: list[str] = field(default_factory=list)
+    depends_on: list[str] = field(default_factory=list)
 
 
-class SkeletonModelContext(BaseModel):
+@dataclass(slots=True)
+class SkeletonModelContext:
     """ADJACENT level — schema only."""
     unique_id: str
     name: str
@@ -153,45 +164,108 @@ class SkeletonModelContext(BaseModel):
     columns: list[dict[str, str]]  # [{"name": ..., "type": ...}]
 
 
-class MinimalModelContext(BaseModel):
+@dataclass(slots=True)
+class MinimalModelContext:
     """DISTANT level — just awareness."""
     unique_id: str
     name: str
     layer: str
     column_count: int
-    key_columns: list[str] = Field(default_factory=list)
+    key_columns: list[str] = field(default_factory=list)
 
 
-class ColumnLineage(BaseModel):
+@dataclass(slots=True)
+class ColumnLineage:
     source_model: str
     source_column: str
     transformation: str = "direct"  # direct | renamed | derived | aggregated
     depth: int = 0
 
 
-class ContextCapsule(BaseModel):
+@dataclass(slots=True)
+class RelevantTest:
+    unique_id: str
+    name: str
+    test_type: str
+    column_name: str = ""
+    severity: str = "error"
+    last_status: str | None = None
+
+
+@dataclass(slots=True)
+class RelevantMacro:
+    unique_id: str
+    name: str
+    package_name: str = ""
+    description: str = ""
+
+
+@dataclass(slots=True)
+class RelevantSource:
+    unique_id: str
+    name: str
+    source_name: str
+    schema_name: str = ""
+    description: str = ""
+
+
+@dataclass(slots=True)
+class ContextCapsule:
     """The primary output of get_context_capsule."""
     task: str
     intent: str
-    pivot_models: list[FullModelContext] = Field(default_factory=list)
-    upstream_models: list[SkeletonModelContext] = Field(default_factory=list)
-    downstream_models: list[MinimalModelContext] = Field(default_factory=list)
-    relevant_tests: list[dict[str, Any]] = Field(default_factory=list)
-    relevant_macros: list[dict[str, Any]] = Field(default_factory=list)
-    relevant_sources: list[dict[str, Any]] = Field(default_factory=list)
-    project_patterns: dict[str, Any] = Field(default_factory=dict)
-    similar_models: list[str] = Field(default_factory=list)
-    session_context: dict[str, Any] = Field(default_factory=dict)
+    pivot_models: list[FullModelContext] = field(default_factory=list)
+    upstream_models: list[SkeletonModelContext] = field(default_factory=list)
+    downstream_models: list[MinimalModelContext] = field(default_factory=list)
+    relevant_tests: list[RelevantTest] = field(default_factory=list)
+    relevant_macros: list[RelevantMacro] = field(default_factory=list)
+    relevant_sources: list[RelevantSource] = field(default_factory=list)
+    project_patterns: dict[str, Any] = field(default_factory=dict)
+    similar_models: list[str] = field(default_factory=list)
+    session_context: dict[str, Any] = field(default_factory=dict)
     confidence: str = "high"  # "high" | "medium" | "low"
-    suggested_refinements: list[str] = Field(default_factory=list)
+    suggested_refinements: list[str] = field(default_factory=list)
     token_estimate: int = 0
     token_budget: int = 10000
 
+    def to_dict(self) -> dict[str, Any]:
+        """Plain-dict form for the MCP response; equal to ``asdict(self)``.
+
+        Built field by field instead of via ``asdict``, which recurses through
+        every value and deep-copies each list and dict along the way.
+        """
+        return {
+            "task": self.task,
+            "intent": self.intent,
+            "pivot_models": [
+                {**_slots_dict(m), "columns": [_slots_dict(c) for c in m.columns]}
+                for m in self.pivot_models
+            ],
+            "upstream_models": [_slots_dict(m) for m in self.upstream_models],
+            "downstream_models": [_slots_dict(m) for m in self.downstream_models],
+            "relevant_tests": [_slots_dict(t) for t in self.relevant_tests],
+            "relevant_macros": [_slots_dict(m) for m in self.relevant_macros],
+            "relevant_sources": [_slots_dict(s) for s in self.relevant_sources],
+            "project_patterns": self.project_patterns,
+            "similar_models": self.similar_models,
+            "session_context": self.session_context,
+            "confidence": self.confidence,
+            "suggested_refinements": self.suggested_refinements,
+            "token_estimate": self.token_estimate,
+            "token_budget": self.token_budget,
+        }
+
+
+def _slots_dict(obj: Any) -> dict[str, Any]:
+    """Shallow field dict of a slotted dataclass (values are not copied)."""
+    return {name: getattr(obj, name) for name in obj.__slots__}
+
 
 # ─── Project statistics ───────────────────────────────────────────────────────
 
 
-class ProjectStats(BaseModel):
+@dataclass(slots=True)
+class ProjectStats:
     project_name: str = ""
     adapter_type: str = ""
     dbt_schema_version: str = ""
@@ -209,7 +283,8 @@ class ProjectStats(BaseModel):
     exposure_count: int = 0
 
 
-class NamingPatterns(BaseModel):
+@dataclass(slots=True)
+class NamingPatterns:
     staging_pattern: str = "stg_{source}__{entity}"
     staging_example: str = ""
     staging_materialization: str = "view"
@@ -223,12 +298,13 @@ class NamingPatterns(BaseModel):
     yaml_requirements: str = ""
 
 
-class ProjectPatterns(BaseModel):
-    naming: NamingPatterns = Field(default_factory=NamingPatterns)
+@dataclass(slots=True)
+class ProjectPatterns:
+    naming: NamingPatterns = field(default_factory=NamingPatterns)
     has_staging: bool = True
     has_intermediate: bool = False
     has_marts: bool = True
-    common_tags: list[str] = Field(default_factory=list)
-    common_materializations: dict[str, str] = Field(default_factory=dict)
-    test_coverage_by_layer: dict[str, float] = Field(default_factory=dict)
-    most_tested_columns: list[str] = Field(default_factory=list)
+    common_tags: list[str] = field(default_factory=list)
+    common_materializations: dict[str, str] = field(default_factory=dict)
+    test_coverage_by_layer: dict[str, float] = field(default_factory=dict)
+    most_tested_columns: list[str] = field(default_factory=list)
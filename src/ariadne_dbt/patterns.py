@@ -2,10 +2,7 @@
 
 from __future__ import annotations
 
-import json
-import re
 import sqlite3
-from collections import Counter
 from typing import Any
 
 from .models import NamingPatterns, ProjectPatterns, ProjectStats
@@ -16,22 +13,57 @@ class PatternExtractor:
 
     def __init__(self, conn: sqlite3.Connection) -> None:
         self._conn = conn
+        # (index generation, result) — reused until the Indexer writes again
+        self._cached_stats: tuple[str | None, ProjectStats] | None = None
+        self._cached_patterns: tuple[str | None, ProjectPatterns] | None = None
 
     # ── Public API ────────────────────────────────────────────────────────────
 
     def get_stats(self) -> ProjectStats:
+        generation = self._get_generation()
+        if self._cached_stats is not None and self._cached_stats[0] == generation:
+            return self._cached_stats[1]
+        stats = self._compute_stats()
+        self._cached_stats = (generation, stats)
+        return stats
+
+    def get_patterns(self) -> ProjectPatterns:
+        generation = self._get_generation()
+        if self._cached_patterns is not None and self._cached_patterns[0] == generation:
+            return self._cached_patterns[1]
+        patterns = self._compute_patterns()
+        self._cached_patterns = (generation, patterns)
+        return patterns
+
+    def invalidate(self) -> None:
+        """Drop cached stats/patterns (they are also recomputed after a reindex)."""
+        self._cached_stats = None
+        self._cached_patterns = None
+
+    def _compute_stats(self) -> ProjectStats:
+        # Positional access only: works with plain-tuple connections too
         meta = self._get_meta()
         counts = self._get_layer_counts()
-        source_info = self._get_source_info()
-        test_info = self._get_test_info()
-        macro_info = self._get_macro_info()
-        exposure_count = self._conn.execute("SELECT COUNT(*) FROM exposures").fetchone()[0]
+        (
+            source_count, source_schema_count, test_count, macro_count,
+            project_macro_count, exposure_count, total_cols, tested_cols,
+        ) = self._conn.execute(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM sources),
+                (SELECT COUNT(DISTINCT source_name) FROM sources),
+                (SELECT COUNT(*) FROM tests),
+                (SELECT COUNT(*) FROM macros),
+                (SELECT COUNT(*) FROM macros WHERE package_name = ?),
+                (SELECT COUNT(*) FROM exposures),
+                (SELECT COUNT(*) FROM columns),
+                (SELECT COUNT(DISTINCT model_id || ':' || column_name)
+                 FROM tests WHERE column_name != '')
+            """,
+            (meta.get("project_name", ""),),
+        ).fetchone()
 
         total_models = sum(counts.values())
-        total_cols = self._conn.execute("SELECT COUNT(*) FROM columns").fetchone()[0]
-        tested_cols = self._conn.execute(
-            "SELECT COUNT(DISTINCT model_id || ':' || column_name) FROM tests WHERE column_name != ''"
-        ).fetchone()[0]
         coverage_pct = int(tested_cols / total_cols * 100) if total_cols > 0 else 0
 
         return ProjectStats(
@@ -43,19 +75,19 @@ class PatternExtractor:
             intermediate_count=counts.get("intermediate", 0),
             marts_count=counts.get("marts", 0),
             other_count=counts.get("other", 0),
-            source_count=source_info["source_count"],
-            source_schema_count=source_info["source_schema_count"],
-            test_count=test_info["total"],
+            source_count=source_count,
+            source_schema_count=source_schema_count,
+            test_count=test_count,
             test_coverage_pct=coverage_pct,
-            macro_count=macro_info["total"],
-            project_macro_count=macro_info["project"],
+            macro_count=macro_count,
+            project_macro_count=project_macro_count,
             exposure_count=exposure_count,
         )
 
-    def get_patterns(self) -> ProjectPatterns:
-        naming = self._extract_naming_patterns()
-        layer_counts = self._get_layer_counts()
+    def _compute_patterns(self) -> ProjectPatterns:
         materializations = self._extract_materializations()
+        naming = self._extract_naming_patterns(materializations)
+        layer_counts = self._get_layer_counts()
         coverage = self._extract_coverage_by_layer()
         common_tags = self._extract_common_tags()
 
@@ -75,10 +107,10 @@ class PatternExtractor:
             """
             SELECT m.unique_id, m.name, m.raw_code, m.compiled_code, m.file_path
             FROM models m
+            LEFT JOIN columns c ON c.model_id = m.unique_id
             WHERE m.layer = ?
-            ORDER BY
-                (SELECT COUNT(*) FROM columns c WHERE c.model_id = m.unique_id) DESC,
-                length(m.description) DESC
+            GROUP BY m.unique_id
+            ORDER BY COUNT(c.name) DESC, length(m.description) DESC
             LIMIT 1
             """,
             (layer,),
@@ -90,9 +122,7 @@ class PatternExtractor:
         # Find a model with good test coverage
         row = self._conn.execute(
             """
-            SELECT m.name, m.layer,
-                GROUP_CONCAT(DISTINCT t.test_type) as test_types,
-                GROUP_CONCAT(DISTINCT t.column_name) as tested_columns
+            SELECT m.unique_id, m.name
             FROM models m
             JOIN tests t ON t.model_id = m.unique_id
             WHERE t.column_name != ''
@@ -104,61 +134,44 @@ class PatternExtractor:
         if not row:
             return ""
 
-        lines = [f"models:", f"  - name: {row['name']}", "    columns:"]
-        cols = self._conn.execute(
+        # One row per test; the first three tested columns are shown
+        tests_by_col: dict[str, list[str]] = {}
+        for column_name, test_type in self._conn.execute(
             """
-            SELECT t.column_name, GROUP_CONCAT(t.test_type, ', ') as test_types
-            FROM tests t
-            JOIN models m ON m.unique_id = t.model_id
-            WHERE m.name = ? AND t.column_name != ''
-            GROUP BY t.column_name
-            LIMIT 3
+            SELECT column_name, test_type FROM tests
+            WHERE model_id = ? AND column_name != ''
+            ORDER BY column_name, rowid
             """,
-            (row["name"],),
-        ).fetchall()
-        for col in cols:
-            lines.append(f"      - name: {col['column_name']}")
-            lines.append(f"        tests:")
-            for tt in (col["test_types"] or "").split(", "):
-                if tt:
-                    lines.append(f"          - {tt}")
+            (row[0],),
+        ):
+            if column_name not in tests_by_col and len(tests_by_col) == 3:
+                break
+            tests_by_col.setdefault(column_name, []).append(test_type)
+
+        lines = ["models:", f"  - name: {row[1]}", "    columns:"]
+        for column_name, test_types in tests_by_col.items():
+            lines.append(f"      - name: {column_name}")
+            lines.append("        tests:")
+            lines.extend(f"          - {tt}" for tt in test_types)
         return "\n".join(lines)
 
     # ── Internal helpers ──────────────────────────────────────────────────────
 
+    def _get_generation(self) -> str | None:
+        row = self._conn.execute(
+            "SELECT value FROM index_metadata WHERE key = 'generation'"
+        ).fetchone()
+        return row[0] if row else None
+
     def _get_meta(self) -> dict[str, str]:
-        rows = self._conn.execute("SELECT key, value FROM index_metadata").fetchall()
-        return {r["key"]: r["value"] for r in rows}
+        return dict(self._conn.execute("SELECT key, value FROM index_metadata").fetchall())
 
     def _get_layer_counts(self) -> dict[str, int]:
-        rows = self._conn.execute(
+        return dict(self._conn.execute(
             "SELECT layer, COUNT(*) as cnt FROM models GROUP BY layer"
-        ).fetchall()
-        return {r["layer"]: r["cnt"] for r in rows}
-
-    def _get_source_info(self) -> dict[str, Any]:
-        total = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
-        schemas = self._conn.execute(
-            "SELECT COUNT(DISTINCT source_name) FROM sources"
-        ).fetchone()[0]
-        return {"source_count": total, "source_schema_count": schemas}
-
-    def _get_test_info(self) -> dict[str, Any]:
-        total = self._conn.execute("SELECT COUNT(*) FROM tests").fetchone()[0]
-        return {"total": total}
-
-    def _get_macro_info(self) -> dict[str, Any]:
-        total = self._conn.execute("SELECT COUNT(*) FROM macros").fetchone()[0]
-        project_name = self._conn.execute(
-            "SELECT value FROM index_metadata WHERE key = 'project_name'"
-        ).fetchone()
-        project_pkg = project_name[0] if project_name else ""
-        project = self._conn.execute(
-            "SELECT COUNT(*) FROM macros WHERE package_name = ?", (project_pkg,)
-        ).fetchone()[0]
-        return {"total": total, "project": project}
+        ).fetchall())
 
-    def _extract_naming_patterns(self) -> NamingPatterns:
+    def _extract_naming_patterns(self, materializations: dict[str, str]) -> NamingPatterns:
         """Infer naming patterns from model names in each layer."""
         patterns = NamingPatterns()
         layers: dict[str, list[str]] = {}
@@ -194,20 +207,11 @@ class PatternExtractor:
 
         # Materializations per layer
         for layer in ("staging", "intermediate", "marts"):
-            mat_rows = self._conn.execute(
-                "SELECT materialization, COUNT(*) as cnt FROM models WHERE layer = ? GROUP BY materialization ORDER BY cnt DESC LIMIT 1",
-                (layer,),
-            ).fetchone()
-            if mat_rows:
-                setattr(patterns, f"{layer}_materialization", mat_rows["materialization"])
-
-        # YAML pattern (look at file paths)
-        yaml_rows = self._conn.execute(
-            "SELECT file_path FROM models WHERE file_path != '' LIMIT 20"
-        ).fetchall()
-        yaml_pattern = self._infer_yaml_pattern([r["file_path"] for r in yaml_rows])
-        if yaml_pattern:
-            patterns.yaml_pattern = yaml_pattern
+            if layer in materializations:
+                setattr(patterns, f"{layer}_materialization", materializations[layer])
+
+        # yaml_pattern keeps the NamingPatterns default: schema file names are
+        # not recorded in the manifest
 
         patterns.naming_summary = (
             f"staging: {patterns.staging_pattern}, "
@@ -223,57 +227,57 @@ class PatternExtractor:
 
         return patterns
 
-    @staticmethod
-    def _infer_yaml_pattern(file_paths: list[str]) -> str:
-        """Guess the YAML schema file naming from model file paths."""
-        # Not directly extractable from manifest — return sensible default
-        return "__{folder_name}_models.yml"
-
     def _extract_materializations(self) -> dict[str, str]:
         """Return most common materialization per layer."""
-        result = {}
-        for layer in ("staging", "intermediate", "marts", "other"):
-            row = self._conn.execute(
-                """
-                SELECT materialization, COUNT(*) as cnt
-                FROM models WHERE layer = ?
-                GROUP BY materialization ORDER BY cnt DESC LIMIT 1
-                """,
-                (layer,),
-            ).fetchone()
-            if row:
-                result[layer] = row["materialization"]
-        return result
+        rows = self._conn.execute(
+            """
+            SELECT layer, materialization FROM (
+                SELECT layer, materialization,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY layer ORDER BY COUNT(*) DESC, materialization
+                    ) AS rn
+                FROM models
+                WHERE layer IN ('staging', 'intermediate', 'marts', 'other')
+                GROUP BY layer, materialization
+            )
+            WHERE rn = 1
+            """
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
 
     def _extract_coverage_by_layer(self) -> dict[str, float]:
         """Return test coverage percentage per layer."""
-        result = {}
-        for layer in ("staging", "intermediate", "marts", "other"):
-            total_cols = self._conn.execute(
-                "SELECT COUNT(*) FROM columns c JOIN models m ON m.unique_id = c.model_id WHERE m.layer = ?",
-                (layer,),
-            ).fetchone()[0]
-            tested_cols = self._conn.execute(
-                """
-                SELECT COUNT(DISTINCT t.model_id || ':' || t.column_name)
-                FROM tests t
-                JOIN models m ON m.unique_id = t.model_id
-                WHERE m.layer = ? AND t.column_name != ''
-                """,
-                (layer,),
-            ).fetchone()[0]
-            result[layer] = round(tested_cols / total_cols * 100, 1) if total_cols > 0 else 0.0
+        result = dict.fromkeys(("staging", "intermediate", "marts", "other"), 0.0)
+        rows = self._conn.execute(
+            """
+            WITH cols AS (
+                SELECT m.layer, COUNT(*) AS n
+                FROM columns c JOIN models m ON m.unique_id = c.model_id
+                GROUP BY m.layer
+            ),
+            tested AS (
+                SELECT m.layer, COUNT(DISTINCT t.model_id || ':' || t.column_name) AS n
+                FROM tests t JOIN models m ON m.unique_id = t.model_id
+                WHERE t.column_name != ''
+                GROUP BY m.layer
+            )
+            SELECT cols.layer, cols.n, COALESCE(tested.n, 0)
+            FROM cols LEFT JOIN tested ON tested.layer = cols.layer
+            """
+        ).fetchall()
+        for layer, total_cols, tested_cols in rows:
+            if layer in result:
+                result[layer] = round(tested_cols / total_cols * 100, 1)
         return result
 
     def _extract_common_tags(self) -> list[str]:
+        # Ties keep first-seen order
         rows = self._conn.execute(
-            "SELECT tags FROM models WHERE tags != '[]'"
+            """
+            SELECT tag FROM model_tags
+            GROUP BY tag
+            ORDER BY COUNT(*) DESC, MIN(rowid)
+            LIMIT 10
+            """
         ).fetchall()
-        counter: Counter = Counter()
-        for row in rows:
-            try:
-                tags = json.loads(row["tags"])
-                counter.update(tags)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        return [tag for tag, _ in counter.most_common(10)]
+        return [row[0] for row in rows]
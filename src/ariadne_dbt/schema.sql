@@ -47,6 +47,34 @@ CREATE TABLE IF NOT EXISTS models (
 CREATE INDEX IF NOT EXISTS idx_models_name  ON models(name);
 CREATE INDEX IF NOT EXISTS idx_models_layer ON models(layer);
 
+-- Normalised copies of the models.tags / refs / sources JSON arrays, so
+-- "models with tag X" is an index lookup instead of a scan + JSON parse.
+-- The JSON columns stay for round-tripping full model rows.
+
+CREATE TABLE IF NOT EXISTS model_tags (
+    model_id  TEXT NOT NULL REFERENCES models(unique_id) ON DELETE CASCADE,
+    tag       TEXT NOT NULL,
+    PRIMARY KEY (model_id, tag)
+);
+
+CREATE INDEX IF NOT EXISTS idx_model_tags_tag ON model_tags(tag);
+
+CREATE TABLE IF NOT EXISTS model_refs (
+    model_id  TEXT NOT NULL REFERENCES models(unique_id) ON DELETE CASCADE,
+    ref_name  TEXT NOT NULL,
+    PRIMARY KEY (model_id, ref_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_model_refs_ref ON model_refs(ref_name);
+
+CREATE TABLE IF NOT EXISTS model_sources (
+    model_id     TEXT NOT NULL REFERENCES models(unique_id) ON DELETE CASCADE,
+    source_name  TEXT NOT NULL,           -- "<source_name>.<table>"
+    PRIMARY KEY (model_id, source_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_model_sources_source ON model_sources(source_name);
+
 -- ─── Columns ─────────────────────────────────────────────────────────────────
 
 CREATE TABLE IF NOT EXISTS columns (
@@ -62,7 +90,8 @@ CREATE TABLE IF NOT EXISTS columns (
     UNIQUE (model_id, name)
 );
 
-CREATE INDEX IF NOT EXISTS idx_columns_model ON columns(model_id);
+-- Lookups by model_id use the UNIQUE (model_id, name) index
+DROP INDEX IF EXISTS idx_columns_model;
 
 -- ─── Sources ─────────────────────────────────────────────────────────────────
 
@@ -105,8 +134,10 @@ CREATE TABLE IF NOT EXISTS tests (
     last_failures   INTEGER
 );
 
-CREATE INDEX IF NOT EXISTS idx_tests_model  ON tests(model_id);
-CREATE INDEX IF NOT EXISTS idx_tests_column ON tests(model_id, column_name);
+-- Covers per-model and per-column test lookups without touching the table
+DROP INDEX IF EXISTS idx_tests_model;
+DROP INDEX IF EXISTS idx_tests_column;
+CREATE INDEX IF NOT EXISTS idx_tests_model_column_type ON tests(model_id, column_name, test_type);
 
 -- ─── Macros ──────────────────────────────────────────────────────────────────
 
@@ -143,8 +174,12 @@ CREATE TABLE IF NOT EXISTS edges (
     PRIMARY KEY (parent_id, child_id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_edges_parent ON edges(parent_id);
-CREATE INDEX IF NOT EXISTS idx_edges_child  ON edges(child_id);
+-- The primary key already covers (parent_id, child_id) for downstream walks;
+-- this mirror covers upstream walks, so both are index-only scans.
+-- Single-column indexes from older schemas are dropped as redundant.
+DROP INDEX IF EXISTS idx_edges_parent;
+DROP INDEX IF EXISTS idx_edges_child;
+CREATE INDEX IF NOT EXISTS idx_edges_child_parent ON edges(child_id, parent_id);
 
 -- ─── Column lineage (populated on demand via SQLGlot) ────────────────────────
 
@@ -178,9 +213,16 @@ CREATE TABLE IF NOT EXISTS usage_log (
     notes           TEXT                    -- free-text note from rating
 );
 
-CREATE INDEX IF NOT EXISTS idx_usage_log_ts        ON usage_log(ts);
-CREATE INDEX IF NOT EXISTS idx_usage_log_tool      ON usage_log(tool_name);
-CREATE INDEX IF NOT EXISTS idx_usage_log_intent    ON usage_log(intent);
+-- get_stats filters on ts and aggregates only these columns, so every stats
+-- query is an index-only range scan. It supersedes the older ts, tool_name
+-- and intent indexes, which the planner would otherwise pick for the
+-- GROUP BY queries and then read every row of the log.
+DROP INDEX IF EXISTS idx_usage_log_ts;
+DROP INDEX IF EXISTS idx_usage_log_tool;
+DROP INDEX IF EXISTS idx_usage_log_intent;
+CREATE INDEX IF NOT EXISTS idx_usage_log_ts_cover ON usage_log(
+    ts, tool_name, intent, focus_model, token_estimate, duration_ms, rating
+);
 
 -- ─── Session events (v1.0, created now to avoid schema migrations) ────────────
 
@@ -208,3 +250,12 @@ CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
     tags,
     tokenize = 'porter ascii'
 );
+
+-- Trigram index over model file paths (external content: rows live in models).
+-- LIKE '%substring%' on this table probes trigrams instead of scanning models.
+CREATE VIRTUAL TABLE IF NOT EXISTS path_index USING fts5(
+    file_path,
+    content = 'models',
+    content_rowid = 'rowid',
+    tokenize = 'trigram'
+);
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import json
 import re
 import sqlite3
 from typing import Any
@@ -20,29 +21,76 @@ INTENT_LAYER_WEIGHTS: dict[str, dict[str, float]] = {
 }
 
 
+# Word runs of 2+ chars; punctuation splits words like whitespace does
+_TOKEN_RE = re.compile(r"\w{2,}")
+_STOPWORDS = frozenset(
+    {"a", "an", "the", "to", "for", "in", "of", "on", "at", "with", "and", "or", "is", "it"}
+)
+
+
 def _tokenize_query(query: str) -> str:
     """Convert a natural-language query to an FTS5 MATCH expression.
 
     Handles multi-word queries with OR and basic stemming via porter tokenizer.
     """
-    # Strip non-alphanumeric (keep spaces/underscores)
-    tokens = re.sub(r"[^\w\s]", " ", query).split()
-    # Filter stopwords
-    stopwords = {"a", "an", "the", "to", "for", "in", "of", "on", "at", "with", "and", "or", "is", "it"}
-    tokens = [t for t in tokens if t.lower() not in stopwords and len(t) > 1]
+    tokens = [t for t in _TOKEN_RE.findall(query) if t.lower() not in _STOPWORDS]
     if not tokens:
         return query
     return " OR ".join(tokens)
 
 
-def _normalize(values: list[float]) -> list[float]:
-    if not values:
-        return values
-    mn, mx = min(values), max(values)
-    r = mx - mn
-    if r == 0:
-        return [1.0] * len(values)
-    return [(v - mn) / r for v in values]
+# Recall phases: up to :recall candidates (unique_id, name, layer,
+# description, centrality, bm25_score), excluded ids already removed
+_FTS_CANDIDATES = """
+    SELECT s.unique_id, m.name, m.layer, m.description,
+           COALESCE(m.centrality, 0.0) AS centrality,
+           -- BM25: lower is better (negative), so negate to get higher-is-better
+           -bm25(search_index, 5, 3, 2, 1, 1) AS bm25_score
+    FROM search_index s
+    JOIN models m ON m.unique_id = s.unique_id
+    WHERE search_index MATCH :match
+      AND s.unique_id NOT IN (SELECT value FROM json_each(:exclude))
+      AND (:layer IS NULL OR m.layer = :layer)
+    ORDER BY bm25_score DESC
+    LIMIT :recall
+"""
+
+# Simple LIKE search when FTS returns nothing
+_FALLBACK_CANDIDATES = """
+    SELECT unique_id, name, layer, description,
+           COALESCE(centrality, 0.0) AS centrality, 0.5 AS bm25_score
+    FROM models
+    WHERE (lower(name) LIKE lower(:pattern) OR lower(description) LIKE lower(:pattern))
+      AND unique_id NOT IN (SELECT value FROM json_each(:exclude))
+      AND (:layer IS NULL OR layer = :layer)
+    ORDER BY centrality DESC
+    LIMIT :recall
+"""
+
+# Re-rank candidates in SQL: min-max normalised BM25 (1.0 when all equal),
+# centrality, intent layer affinity and a substring name bonus
+_RANK_SQL = """
+    WITH cand AS ({candidates}),
+    scored AS (
+        SELECT *,
+            COALESCE(
+                (bm25_score - MIN(bm25_score) OVER ())
+                / NULLIF(MAX(bm25_score) OVER () - MIN(bm25_score) OVER (), 0),
+                1.0
+            ) AS norm_bm25,
+            COALESCE(json_extract(:layer_weights, '$.' || layer), 0.0) AS layer_boost,
+            CASE WHEN instr(lower(name), :needle) > 0 THEN 0.15 ELSE 0.0 END AS name_bonus
+        FROM cand
+    )
+    SELECT unique_id, name, layer, description, bm25_score, centrality,
+           layer_boost, name_bonus,
+           norm_bm25 * 0.55 + centrality * 0.20 + layer_boost * 0.10 + name_bonus * 0.15
+    FROM scored
+    ORDER BY 9 DESC, bm25_score DESC
+    LIMIT :limit
+"""
+_FTS_RANK_SQL = _RANK_SQL.format(candidates=_FTS_CANDIDATES)
+_FALLBACK_RANK_SQL = _RANK_SQL.format(candidates=_FALLBACK_CANDIDATES)
 
 
 class HybridSearch:
@@ -57,92 +105,38 @@ class HybridSearch:
         intent: str = "explore",
         limit: int = 10,
         exclude_ids: set[str] | None = None,
+        layer: str | None = None,
     ) -> list[SearchResult]:
-        """Return top ``limit`` models ranked by BM25 + centrality + layer affinity."""
-        fts_query = _tokenize_query(query)
-        candidates = self._fts_phase(fts_query, limit=limit * 4)
-
-        if not candidates:
-            # Fallback: name LIKE search
-            candidates = self._fallback_search(query, limit=limit * 4)
-
-        if exclude_ids:
-            candidates = [c for c in candidates if c["unique_id"] not in exclude_ids]
-
-        # Re-rank
-        layer_weights = INTENT_LAYER_WEIGHTS.get(intent, {})
-        bm25_scores = [c["bm25_score"] for c in candidates]
-        norm_bm25 = _normalize(bm25_scores)
-        query_lower = query.lower()
-
-        results = []
-        for i, c in enumerate(candidates):
-            centrality = c.get("centrality", 0.0) or 0.0
-            layer_boost = layer_weights.get(c.get("layer", "other"), 0.0)
-            name_bonus = 0.15 if query_lower in c["name"].lower() else 0.0
-
-            score = (
-                norm_bm25[i] * 0.55
-                + centrality * 0.20
-                + layer_boost * 0.10
-                + name_bonus * 0.15
-            )
-
-            results.append(SearchResult(
-                unique_id=c["unique_id"],
-                name=c["name"],
-                layer=c.get("layer", "other"),
-                description=c.get("description", ""),
-                bm25_score=bm25_scores[i],
-                centrality=centrality,
-                layer_boost=layer_boost,
-                name_bonus=name_bonus,
-                score=score,
-            ))
-
-        results.sort(key=lambda r: r.score, reverse=True)
-        return results[:limit]
-
-    def _fts_phase(self, fts_query: str, limit: int) -> list[dict[str, Any]]:
+        """Return top ``limit`` models ranked by BM25 + centrality + layer affinity.
+
+        ``layer`` restricts candidates to one layer before ranking.
+        """
+        params = {
+            "match": _tokenize_query(query),
+            "pattern": f"%{query}%",
+            "exclude": json.dumps(sorted(exclude_ids or ())),
+            "recall": limit * 4,
+            "layer": layer,
+            "layer_weights": json.dumps(INTENT_LAYER_WEIGHTS.get(intent, {})),
+            "needle": query.lower(),
+            "limit": limit,
+        }
+        rows = self._ranked(_FTS_RANK_SQL, params)
+        if not rows:
+            rows = self._ranked(_FALLBACK_RANK_SQL, params)
+        # Ranking SELECT lists columns in SearchResult field order
+        return [SearchResult(*r) for r in rows]
+
+    def _ranked(self, sql: str, params: dict[str, Any]) -> list[tuple[Any, ...]]:
+        # Plain tuples: only the final ``limit`` rows ever reach Python
+        cur = self._conn.cursor()
+        cur.row_factory = None
         try:
-            rows = self._conn.execute(
-                """
-                SELECT
-                    s.unique_id,
-                    m.name,
-                    m.layer,
-                    m.description,
-                    m.centrality,
-                    -- BM25: lower is better (negative), so negate to get higher-is-better
-                    -bm25(search_index, 5, 3, 2, 1, 1) AS bm25_score
-                FROM search_index s
-                JOIN models m ON m.unique_id = s.unique_id
-                WHERE search_index MATCH ?
-                ORDER BY bm25_score DESC
-                LIMIT ?
-                """,
-                (fts_query, limit),
-            ).fetchall()
-            return [dict(r) for r in rows]
+            return cur.execute(sql, params).fetchall()
         except sqlite3.OperationalError:
+            # Malformed FTS5 MATCH expression
             return []
 
-    def _fallback_search(self, query: str, limit: int) -> list[dict[str, Any]]:
-        """Simple LIKE search when FTS returns nothing."""
-        pattern = f"%{query}%"
-        rows = self._conn.execute(
-            """
-            SELECT unique_id, name, layer, description, centrality,
-                   0.5 AS bm25_score
-            FROM models
-            WHERE lower(name) LIKE lower(?) OR lower(description) LIKE lower(?)
-            ORDER BY centrality DESC
-            LIMIT ?
-            """,
-            (pattern, pattern, limit),
-        ).fetchall()
-        return [dict(r) for r in rows]
-
     # ── Path and column search ───────────────────────────────────────────────
 
     def resolve_file_paths(self, paths: list[str]) -> list[str]:
@@ -151,39 +145,33 @@ class HybridSearch:
         Matches against models.file_path exactly, or by extracting the model
         name from the path basename (strip .sql).
         """
-        results: list[str] = []
-        seen: set[str] = set()
+        # (path, model name from the basename, or None for YAML files)
+        candidates = []
         for path in paths:
-            # Try exact file_path match first
-            row = self._conn.execute(
-                "SELECT unique_id FROM models WHERE file_path = ?", (path,)
-            ).fetchone()
-            if row:
-                uid = row[0]
-                if uid not in seen:
-                    results.append(uid)
-                    seen.add(uid)
-                continue
-
-            # Try matching by basename (strip .sql extension)
             basename = path.rsplit("/", 1)[-1]
             if basename.endswith(".sql"):
-                model_name = basename[:-4]
+                model_name: str | None = basename[:-4]
             elif basename.endswith(".yml") or basename.endswith(".yaml"):
-                continue  # Skip YAML files, they aren't models
+                model_name = None  # Skip YAML files, they aren't models
             else:
                 model_name = basename
+            candidates.append((path, model_name))
 
-            row = self._conn.execute(
-                "SELECT unique_id FROM models WHERE lower(name) = lower(?)",
-                (model_name,),
-            ).fetchone()
-            if row:
-                uid = row[0]
-                if uid not in seen:
-                    results.append(uid)
-                    seen.add(uid)
-        return results
+        # One query for all paths; an exact file_path match wins over the name
+        rows = self._conn.execute(
+            """
+            SELECT
+                (SELECT unique_id FROM models WHERE file_path = json_extract(p.value, '$[0]')),
+                (SELECT unique_id FROM models
+                 WHERE lower(name) = lower(json_extract(p.value, '$[1]')))
+            FROM json_each(?) p
+            ORDER BY p.key
+            """,
+            (json.dumps(candidates),),
+        ).fetchall()
+        return list(dict.fromkeys(
+            by_path or by_name for by_path, by_name in rows if by_path or by_name
+        ))
 
     def find_by_column(self, column_name: str, limit: int = 20) -> list[dict[str, Any]]:
         """Find models containing a column with the given name."""
@@ -205,12 +193,15 @@ class HybridSearch:
 
     def find_by_path(self, path_pattern: str, limit: int = 20) -> list[dict[str, Any]]:
         """Find models matching a file path pattern (supports LIKE % wildcards)."""
+        # LIKE on the trigram table is answered from the index whenever the
+        # pattern has a run of 3+ literal characters; shorter ones still scan
         rows = self._conn.execute(
             """
-            SELECT unique_id, name, layer, file_path, description
-            FROM models
-            WHERE file_path LIKE ?
-            ORDER BY name
+            SELECT m.unique_id, m.name, m.layer, m.file_path, m.description
+            FROM path_index p
+            JOIN models m ON m.rowid = p.rowid
+            WHERE p.file_path LIKE ?
+            ORDER BY m.name
             LIMIT ?
             """,
             (path_pattern, limit),
@@ -238,19 +229,47 @@ class HybridSearch:
         ).fetchone()
         return dict(row) if row else None
 
+    def get_model_by_name_or_id(self, name_or_id: str) -> dict[str, Any] | None:
+        """Resolve a model name (case-insensitive) or unique_id in one query.
+
+        A name match wins over a unique_id match, as in
+        ``get_model_by_name(q) or get_model_by_id(q)``.
+        """
+        row = self._conn.execute(
+            """
+            SELECT * FROM models
+            WHERE lower(name) = lower(:q) OR unique_id = :q
+            ORDER BY unique_id = :q, rowid
+            LIMIT 1
+            """,
+            {"q": name_or_id},
+        ).fetchone()
+        return dict(row) if row else None
+
     def get_columns(self, model_id: str) -> list[dict[str, Any]]:
+        """Return a model's columns, each with the list of its test types."""
+        test_types: dict[str, list[str]] = {}
+        for column_name, test_type in self._conn.execute(
+            "SELECT column_name, test_type FROM tests WHERE model_id = ? AND column_name != ''",
+            (model_id,),
+        ):
+            test_types.setdefault(column_name, []).append(test_type)
+
         rows = self._conn.execute(
             """
-            SELECT c.name, c.data_type, c.description, c.is_primary_key, c.is_foreign_key,
-                   GROUP_CONCAT(t.test_type, ',') as test_types
-            FROM columns c
-            LEFT JOIN tests t ON t.model_id = c.model_id AND t.column_name = c.name
-            WHERE c.model_id = ?
-            GROUP BY c.name
+            SELECT name, data_type, description, is_primary_key, is_foreign_key
+            FROM columns
+            WHERE model_id = ?
+            ORDER BY name
             """,
             (model_id,),
         ).fetchall()
-        return [dict(r) for r in rows]
+        columns = []
+        for r in rows:
+            col = dict(r)
+            col["test_types"] = test_types.get(col["name"], [])
+            columns.append(col)
+        return columns
 
     def get_tests_for_model(self, model_id: str) -> list[dict[str, Any]]:
         rows = self._conn.execute(
@@ -264,20 +283,17 @@ class HybridSearch:
 
     def get_macros_for_model(self, model_id: str) -> list[dict[str, Any]]:
         """Return macros used by a model (via SQL reference matching)."""
-        row = self._conn.execute(
-            "SELECT raw_code, compiled_code FROM models WHERE unique_id = ?", (model_id,)
-        ).fetchone()
-        if not row:
-            return []
-        sql = row["compiled_code"] or row["raw_code"] or ""
-        macro_rows = self._conn.execute(
-            "SELECT unique_id, name, package_name, description FROM macros"
+        rows = self._conn.execute(
+            """
+            SELECT mc.unique_id, mc.name, mc.package_name, mc.description
+            FROM macros mc,
+                 (SELECT COALESCE(NULLIF(compiled_code, ''), raw_code, '') AS code
+                  FROM models WHERE unique_id = ?) AS m
+            WHERE instr(m.code, mc.name) > 0
+            """,
+            (model_id,),
         ).fetchall()
-        used = []
-        for m in macro_rows:
-            if m["name"] in sql:
-                used.append(dict(m))
-        return used
+        return [dict(r) for r in rows]
 
     def get_sources_for_model(self, model_id: str) -> list[dict[str, Any]]:
         """Return sources that feed into a model (direct upstream sources)."""
@@ -292,26 +308,59 @@ class HybridSearch:
         ).fetchall()
         return [dict(r) for r in rows]
 
+    def get_sources_for_models(self, model_ids: list[str]) -> list[dict[str, Any]]:
+        """Return the distinct direct upstream sources of several models at once."""
+        if not model_ids:
+            return []
+        rows = self._conn.execute(
+            """
+            SELECT DISTINCT s.unique_id, s.name, s.source_name, s.schema_name, s.description
+            FROM edges e
+            JOIN sources s ON s.unique_id = e.parent_id
+            WHERE e.child_id IN (SELECT value FROM json_each(?))
+            ORDER BY s.source_name, s.name
+            """,
+            (json.dumps(model_ids),),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
     def get_test_coverage(self, model_id: str) -> dict[str, Any]:
         """Return test coverage summary for a model."""
-        columns = self.get_columns(model_id)
         tests = self.get_tests_for_model(model_id)
 
-        tested_cols = {t["column_name"] for t in tests if t["column_name"]}
-        total_cols = len(columns)
-        tested_count = sum(1 for c in columns if c["name"] in tested_cols)
-        untested = [c["name"] for c in columns if c["name"] not in tested_cols]
+        # One pass over the columns, with the tested flag computed in SQL
+        cur = self._conn.cursor()
+        cur.row_factory = None
+        total_cols = tested_count = 0
+        untested: list[str] = []
+        pk_candidates: list[str] = []
+        for name, is_primary_key, tested in cur.execute(
+            """
+            SELECT c.name, c.is_primary_key,
+                   EXISTS (SELECT 1 FROM tests t
+                           WHERE t.model_id = c.model_id AND t.column_name = c.name)
+            FROM columns c
+            WHERE c.model_id = ?
+            ORDER BY c.name
+            """,
+            (model_id,),
+        ):
+            total_cols += 1
+            if tested:
+                tested_count += 1
+            else:
+                untested.append(name)
+            if is_primary_key or "id" in name.lower():
+                pk_candidates.append(name)
 
         coverage_pct = int(tested_count / total_cols * 100) if total_cols > 0 else 0
 
         # Suggest missing tests
         suggestions = []
-        col_names_lower = {c["name"].lower() for c in columns}
         tested_types = {t["test_type"] for t in tests}
         if "not_null" not in tested_types:
             suggestions.append("Add not_null tests to key columns")
         if "unique" not in tested_types:
-            pk_candidates = [c["name"] for c in columns if "id" in c["name"].lower() or c["is_primary_key"]]
             if pk_candidates:
                 suggestions.append(f"Add unique test to: {', '.join(pk_candidates[:3])}")
         if untested and total_cols > 5:
@@ -2,23 +2,44 @@
 
 from __future__ import annotations
 
+import json
 import sqlite3
+import threading
 import time
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Any
 
 from fastmcp import FastMCP
 
 from .capsule import CapsuleBuilder, detect_intent
-from .config import EngineConfig, load_config
+from .config import CapsuleConfig, EngineConfig, load_config
 from .graph import GraphOps
-from .indexer import Indexer
+from .indexer import Indexer, open_connection
 from .patterns import PatternExtractor
 from .search import HybridSearch
-from .usage import UsageLogger
-
-# Tracks the most-recent capsule log_id per db_path for rate_capsule
-_last_capsule_log_id: dict[Path, int] = {}
+from .usage import BackgroundUsageLogger, UsageLogger
+
+# Tracks the most-recent capsule log row per db_path for rate_capsule; the id
+# resolves once the background usage writer has committed the row
+_last_capsule_log_id: dict[Path, Future[int]] = {}
+# Seconds rate_capsule waits for that row before giving up
+_RATE_LOG_TIMEOUT = 5.0
+
+# Constant SQL text so the connection's statement cache (open_connection)
+# keeps these prepared across tool calls
+_MODELS_BY_ID_SQL = """
+    SELECT unique_id, name, layer, materialization FROM models
+    WHERE unique_id IN (SELECT value FROM json_each(?))
+"""
+_SOURCES_BY_ID_SQL = """
+    SELECT unique_id, source_name || '.' || name FROM sources
+    WHERE unique_id IN (SELECT value FROM json_each(?))
+"""
+_INDEX_COUNTS_SQL = """
+    SELECT (SELECT COUNT(*) FROM models), (SELECT COUNT(*) FROM sources),
+           (SELECT COUNT(*) FROM tests)
+"""
 
 
 # ── Server factory ────────────────────────────────────────────────────────────
@@ -26,6 +47,7 @@ _last_capsule_log_id: dict[Path, int] = {}
 def create_server(config: EngineConfig | None = None) -> FastMCP:
     cfg = config or load_config()
     db_path = cfg.absolute_index_path
+    usage = BackgroundUsageLogger(db_path)
 
     mcp = FastMCP(
         name="ariadne",
@@ -88,8 +110,7 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
             project_patterns, similar_models, confidence, suggested_refinements,
             token_estimate
         """
-        conn = _get_conn(db_path)
-        builder = CapsuleBuilder(conn, cfg.capsule)
+        builder = _get_builder(db_path, cfg.capsule)
         t0 = time.perf_counter()
         capsule = builder.build(
             task=task,
@@ -99,7 +120,7 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
             token_budget=token_budget,
         )
         duration_ms = round((time.perf_counter() - t0) * 1000)
-        log_id = UsageLogger(conn).log(
+        _last_capsule_log_id[db_path] = usage.log(
             "get_context_capsule",
             task_text=task,
             intent=capsule.intent,
@@ -108,8 +129,7 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
             token_estimate=capsule.token_estimate,
             duration_ms=duration_ms,
         )
-        _last_capsule_log_id[db_path] = log_id
-        return capsule.model_dump()
+        return capsule.to_dict()
 
     # ── Tool: discover_models ──────────────────────────────────────────────────
 
@@ -143,8 +163,7 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
             file_path, relationship (pivot/upstream/downstream/search),
             and distance from pivot.
         """
-        conn = _get_conn(db_path)
-        builder = CapsuleBuilder(conn, cfg.capsule)
+        builder = _get_builder(db_path, cfg.capsule)
         limit = min(max(1, limit), 80)
         t0 = time.perf_counter()
         models = builder.discover(
@@ -155,7 +174,7 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
             limit=limit,
         )
         duration_ms = round((time.perf_counter() - t0) * 1000)
-        UsageLogger(conn).log(
+        usage.log(
             "discover_models",
             task_text=task,
             focus_model=focus_model,
@@ -191,9 +210,9 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         """
         conn = _get_conn(db_path)
         search = HybridSearch(conn)
-        graph = GraphOps(conn)
+        graph = _get_graph(db_path)
 
-        row = search.get_model_by_name(model_name) or search.get_model_by_id(model_name)
+        row = search.get_model_by_name_or_id(model_name)
         if not row:
             return {"error": f"Model '{model_name}' not found. Use search_models to find similar names."}
 
@@ -206,17 +225,9 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         upstream = graph.upstream(uid, depth=1)
         downstream = graph.downstream(uid, depth=1)
 
-        upstream_names = []
-        for up_id, _ in upstream:
-            up_row = conn.execute("SELECT name FROM models WHERE unique_id = ?", (up_id,)).fetchone()
-            if up_row:
-                upstream_names.append(up_row[0])
-
-        downstream_names = []
-        for dn_id, _ in downstream:
-            dn_row = conn.execute("SELECT name FROM models WHERE unique_id = ?", (dn_id,)).fetchone()
-            if dn_row:
-                downstream_names.append(dn_row[0])
+        nodes = _lookup_models(conn, [n for n, _ in upstream] + [n for n, _ in downstream])
+        upstream_names = [nodes[n][0] for n, _ in upstream if n in nodes]
+        downstream_names = [nodes[n][0] for n, _ in downstream if n in nodes]
 
         return {
             "unique_id": uid,
@@ -256,9 +267,9 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         """
         conn = _get_conn(db_path)
         search = HybridSearch(conn)
-        graph = GraphOps(conn)
+        graph = _get_graph(db_path)
 
-        row = search.get_model_by_name(model_name) or search.get_model_by_id(model_name)
+        row = search.get_model_by_name_or_id(model_name)
         if not row:
             return {"error": f"Model '{model_name}' not found."}
 
@@ -270,33 +281,31 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         }
 
         def enrich(nodes: list[tuple[str, int]]) -> list[dict[str, Any]]:
+            model_ids: list[str] = []
+            source_ids: list[str] = []
+            for node_id, _ in nodes:
+                (source_ids if node_id.startswith("source.") else model_ids).append(node_id)
+            models = _lookup_models(conn, model_ids)
+            sources = _lookup_sources(conn, source_ids)
             enriched = []
             for node_id, dist in nodes:
-                node_row = conn.execute(
-                    "SELECT name, layer, materialization FROM models WHERE unique_id = ?",
-                    (node_id,),
-                ).fetchone()
-                if node_row:
+                if node_id in models:
+                    name, layer, materialization = models[node_id]
                     enriched.append({
                         "unique_id": node_id,
-                        "name": node_row[0],
-                        "layer": node_row[1],
-                        "materialization": node_row[2],
+                        "name": name,
+                        "layer": layer,
+                        "materialization": materialization,
+                        "distance": dist,
+                    })
+                elif node_id in sources:
+                    enriched.append({
+                        "unique_id": node_id,
+                        "name": sources[node_id],
+                        "layer": "source",
+                        "materialization": "external",
                         "distance": dist,
                     })
-                elif node_id.startswith("source."):
-                    src_row = conn.execute(
-                        "SELECT name, source_name FROM sources WHERE unique_id = ?",
-                        (node_id,),
-                    ).fetchone()
-                    if src_row:
-                        enriched.append({
-                            "unique_id": node_id,
-                            "name": f"{src_row[1]}.{src_row[0]}",
-                            "layer": "source",
-                            "materialization": "external",
-                            "distance": dist,
-                        })
             return enriched
 
         if direction in ("upstream", "both"):
@@ -328,9 +337,9 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         """
         conn = _get_conn(db_path)
         search = HybridSearch(conn)
-        graph = GraphOps(conn)
+        graph = _get_graph(db_path)
 
-        row = search.get_model_by_name(model_name) or search.get_model_by_id(model_name)
+        row = search.get_model_by_name_or_id(model_name)
         if not row:
             return {"error": f"Model '{model_name}' not found. Use search_models to find similar names."}
 
@@ -363,35 +372,30 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         limit = min(max(1, limit), 50)
 
         t0 = time.perf_counter()
-        results = search.search(query, intent="explore", limit=limit * 2)
-
-        if layer:
-            results = [r for r in results if r.layer == layer]
-
-        results = results[:limit]
+        results = search.search(query, intent="explore", limit=limit, layer=layer or None)
         duration_ms = round((time.perf_counter() - t0) * 1000)
 
-        UsageLogger(conn).log(
+        items = []
+        token_estimate = 0
+        for r in results:
+            description = r.description or ""
+            token_estimate += len(description) // 4
+            items.append({
+                "unique_id": r.unique_id,
+                "name": r.name,
+                "layer": r.layer,
+                "description": description[:200],
+                "score": round(r.score, 4),
+            })
+
+        usage.log(
             "search_models",
             task_text=query,
-            token_estimate=sum(len(r.description or "") // 4 for r in results),
+            token_estimate=token_estimate,
             duration_ms=duration_ms,
         )
 
-        return {
-            "query": query,
-            "count": len(results),
-            "results": [
-                {
-                    "unique_id": r.unique_id,
-                    "name": r.name,
-                    "layer": r.layer,
-                    "description": r.description[:200] if r.description else "",
-                    "score": round(r.score, 4),
-                }
-                for r in results
-            ],
-        }
+        return {"query": query, "count": len(items), "results": items}
 
     # ── Tool: find_models_by_column ──────────────────────────────────────────
 
@@ -469,17 +473,18 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
                 ),
             }
 
-        with Indexer(db_path) as idx:
-            idx.index_manifest(manifest_path)
-            if cfg.catalog_path.exists():
-                idx.index_catalog(cfg.catalog_path)
-            if cfg.run_results_path.exists():
-                idx.index_run_results(cfg.run_results_path)
+        has_catalog = cfg.catalog_path.exists()
+        has_run_results = cfg.run_results_path.exists()
+        with Indexer.from_config(cfg) as idx:
+            with idx.batch():
+                idx.index_manifest(manifest_path)
+                if has_catalog:
+                    idx.index_catalog(cfg.catalog_path)
+                if has_run_results:
+                    idx.index_run_results(cfg.run_results_path)
 
             conn = idx.conn
-            model_count = conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
-            source_count = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
-            test_count = conn.execute("SELECT COUNT(*) FROM tests").fetchone()[0]
+            model_count, source_count, test_count = conn.execute(_INDEX_COUNTS_SQL).fetchone()
 
         return {
             "success": True,
@@ -487,8 +492,8 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
             "models_indexed": model_count,
             "sources_indexed": source_count,
             "tests_indexed": test_count,
-            "catalog_included": cfg.catalog_path.exists(),
-            "run_results_included": cfg.run_results_path.exists(),
+            "catalog_included": has_catalog,
+            "run_results_included": has_run_results,
         }
 
     # ── Tool: rate_capsule ────────────────────────────────────────────────────
@@ -510,9 +515,13 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
         Returns:
             Confirmation with the log_id that was rated
         """
-        log_id = _last_capsule_log_id.get(db_path)
-        if log_id is None:
+        pending = _last_capsule_log_id.get(db_path)
+        if pending is None:
             return {"success": False, "error": "No capsule call found in this session yet."}
+        try:
+            log_id = pending.result(timeout=_RATE_LOG_TIMEOUT)
+        except Exception as exc:  # writer failed, or is stuck behind a lock
+            return {"success": False, "error": f"The capsule call was not logged: {exc!r}"}
         conn = _get_conn(db_path)
         UsageLogger(conn).rate(log_id, rating, notes)
         return {"success": True, "log_id": log_id, "rating": rating}
@@ -520,20 +529,87 @@ def create_server(config: EngineConfig | None = None) -> FastMCP:
     return mcp
 
 
+# ── Node lookups ──────────────────────────────────────────────────────────────
+
+def _lookup_models(
+    conn: sqlite3.Connection, ids: list[str]
+) -> dict[str, tuple[str, str, str]]:
+    """Map model unique_id -> (name, layer, materialization) in one query."""
+    if not ids:
+        return {}
+    rows = conn.execute(_MODELS_BY_ID_SQL, (json.dumps(ids),))
+    return {uid: (name, layer, mat) for uid, name, layer, mat in rows}
+
+
+def _lookup_sources(conn: sqlite3.Connection, ids: list[str]) -> dict[str, str]:
+    """Map source unique_id -> "source_name.name" in one query."""
+    if not ids:
+        return {}
+    rows = conn.execute(_SOURCES_BY_ID_SQL, (json.dumps(ids),))
+    return dict(rows)
+
+
 # ── Connection helper ─────────────────────────────────────────────────────────
 
-_connections: dict[Path, sqlite3.Connection] = {}
+# FastMCP runs sync tools on a worker threadpool. Each worker keeps its own
+# connection (and GraphOps), so concurrent tool calls read the WAL database in
+# parallel instead of serializing on one shared handle.
+_local = threading.local()
+
+
+# Seconds between liveness probes of a cached connection
+_ALIVE_CHECK_INTERVAL = 30.0
 
 
 def _get_conn(db_path: Path) -> sqlite3.Connection:
-    """Return a cached SQLite connection for the given database path."""
-    if db_path not in _connections or not _is_alive(_connections[db_path]):
-        conn = sqlite3.connect(str(db_path), check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode = WAL")
-        conn.execute("PRAGMA foreign_keys = ON")
-        _connections[db_path] = conn
-    return _connections[db_path]
+    """Return this thread's cached SQLite connection for the given database path."""
+    # db_path → (connection, monotonic time it was last known to be alive)
+    connections: dict[Path, tuple[sqlite3.Connection, float]] = (
+        _local.__dict__.setdefault("connections", {})
+    )
+    now = time.monotonic()
+    cached = connections.get(db_path)
+    if cached is not None:
+        conn, checked_at = cached
+        if now - checked_at < _ALIVE_CHECK_INTERVAL:
+            return conn
+        if _is_alive(conn):
+            connections[db_path] = (conn, now)
+            return conn
+    # Not query_only: rate_capsule updates usage_log
+    conn = open_connection(db_path)
+    connections[db_path] = (conn, now)
+    return conn
+
+
+def _get_graph(db_path: Path) -> GraphOps:
+    """Return a GraphOps on this thread's connection that outlives a single tool call.
+
+    Keeping the instance lets its traversal cache serve repeated lineage
+    lookups; the cache resets itself whenever the index is rebuilt.
+    """
+    conn = _get_conn(db_path)
+    graphs: dict[Path, GraphOps] = _local.__dict__.setdefault("graphs", {})
+    graph = graphs.get(db_path)
+    if graph is None or graph.conn is not conn:
+        graph = graphs[db_path] = GraphOps(conn)
+    return graph
+
+
+def _get_builder(db_path: Path, config: CapsuleConfig) -> CapsuleBuilder:
+    """Return this thread's CapsuleBuilder, kept across tool calls like GraphOps.
+
+    A fresh builder per call would start with empty traversal and project
+    pattern caches; both reset themselves whenever the index is rebuilt.
+    """
+    conn = _get_conn(db_path)
+    builders: dict[Path, tuple[sqlite3.Connection, CapsuleConfig, CapsuleBuilder]] = (
+        _local.__dict__.setdefault("builders", {})
+    )
+    cached = builders.get(db_path)
+    if cached is None or cached[0] is not conn or cached[1] is not config:
+        cached = builders[db_path] = (conn, config, CapsuleBuilder(conn, config))
+    return cached[2]
 
 
 def _is_alive(conn: sqlite3.Connection) -> bool:
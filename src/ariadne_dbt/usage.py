@@ -2,22 +2,95 @@
 
 Every MCP tool call is recorded to the ``usage_log`` table in the local
 SQLite index.  ``UsageLogger`` writes those rows and computes the stats
-surfaced by ``ariadne usage``.
+surfaced by ``ariadne usage``; ``BackgroundUsageLogger`` queues them onto a
+writer thread so the MCP server never commits on a tool call's critical path.
 """
 
 from __future__ import annotations
 
+import atexit
+import copy
+import json
+import queue
 import sqlite3
-from datetime import datetime, timezone
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any
 
+from .indexer import open_connection
+
+# Seconds a get_stats result may be reused; a backstop for writes from other
+# connections that leave the probe unchanged (e.g. two ratings that swap values)
+_STATS_TTL = 2.0
+
+# Changes whenever the window gains or loses rows or a rating is set or
+# changed, including writes from other connections (``rate`` in the server)
+_STATS_PROBE_SQL = """
+    SELECT MAX(id), COUNT(*), SUM(rating IS NOT NULL), TOTAL(rating)
+    FROM usage_log WHERE ts >= ?
+"""
+
+_INSERT_SQL = """
+    INSERT INTO usage_log
+        (ts, tool_name, task_text, intent, focus_model,
+         pivot_count, token_estimate, duration_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# AVG skips NULLs, so calls without an estimate/duration/rating don't count
+_STATS_SQL = """
+    WITH w AS (
+        SELECT tool_name, intent, focus_model, token_estimate, duration_ms, rating,
+               substr(ts, 1, 10) AS day
+        FROM usage_log WHERE ts >= ?
+    )
+    SELECT
+        COUNT(*), AVG(token_estimate), AVG(duration_ms), AVG(rating),
+        (SELECT json_group_array(json_array(tool_name, c))
+         FROM (SELECT tool_name, COUNT(*) AS c FROM w GROUP BY tool_name)),
+        (SELECT json_group_array(json_array(intent, c))
+         FROM (SELECT intent, COUNT(*) AS c FROM w WHERE intent IS NOT NULL GROUP BY intent)),
+        (SELECT json_group_array(json_array(focus_model, c))
+         FROM (SELECT focus_model, COUNT(*) AS c FROM w WHERE focus_model IS NOT NULL
+               GROUP BY focus_model ORDER BY c DESC, focus_model LIMIT 10)),
+        (SELECT json_group_array(json_array(day, c, t))
+         FROM (SELECT day, COUNT(*) AS c, AVG(token_estimate) AS t FROM w GROUP BY day))
+    FROM w
+"""
+
 
 class UsageLogger:
     def __init__(self, conn: sqlite3.Connection) -> None:
         self.conn = conn
+        self._in_batch = False
+        # days → ((max id, row count) in the window, monotonic time, stats)
+        self._stats_cache: dict[int, tuple[tuple[Any, ...], float, dict[str, Any]]] = {}
 
     # ── Write ──────────────────────────────────────────────────────────────────
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Commit every ``log``/``rate`` inside the block once, at the end."""
+        if self._in_batch:
+            yield
+            return
+        self._in_batch = True
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+        finally:
+            self._in_batch = False
+
     def log(
         self,
         tool_name: str,
@@ -30,88 +103,69 @@ class UsageLogger:
         duration_ms: int | None = None,
     ) -> int:
         """Insert one usage row. Returns the new row id."""
-        ts = datetime.now(timezone.utc).isoformat()
         cur = self.conn.execute(
-            """
-            INSERT INTO usage_log
-                (ts, tool_name, task_text, intent, focus_model,
-                 pivot_count, token_estimate, duration_ms)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (ts, tool_name, task_text, intent, focus_model,
-             pivot_count, token_estimate, duration_ms),
+            _INSERT_SQL,
+            _usage_row(tool_name, task_text, intent, focus_model,
+                       pivot_count, token_estimate, duration_ms),
         )
-        self.conn.commit()
+        self._commit()
         return cur.lastrowid  # type: ignore[return-value]
 
+    def log_many(self, calls: Iterable[Mapping[str, Any]]) -> None:
+        """Insert several usage rows with one ``executemany`` and one commit.
+
+        Each mapping holds ``log``'s arguments, e.g. ``{"tool_name": ..., "intent": ...}``.
+        """
+        self.conn.executemany(_INSERT_SQL, (_usage_row(**call) for call in calls))
+        self._commit()
+
     def rate(self, log_id: int, rating: int, notes: str | None = None) -> None:
         """Attach a 1–5 rating to an existing log row."""
         self.conn.execute(
             "UPDATE usage_log SET rating = ?, notes = ? WHERE id = ?",
             (max(1, min(5, rating)), notes, log_id),
         )
-        self.conn.commit()
+        self._commit()
+
+    def _commit(self) -> None:
+        self._stats_cache.clear()
+        # Inside batch() the block's exit owns the commit
+        if not self._in_batch:
+            self.conn.commit()
 
     # ── Read ───────────────────────────────────────────────────────────────────
 
     def get_stats(self, days: int = 30) -> dict[str, Any]:
-        """Return a stats dict covering the last ``days`` days."""
-        since = _days_ago_iso(days)
-
-        total = self.conn.execute(
-            "SELECT COUNT(*) FROM usage_log WHERE ts >= ?", (since,)
-        ).fetchone()[0]
+        """Return a stats dict covering the last ``days`` days.
 
-        by_tool = dict(
-            self.conn.execute(
-                "SELECT tool_name, COUNT(*) FROM usage_log WHERE ts >= ? GROUP BY tool_name",
-                (since,),
-            ).fetchall()
-        )
+        ``by_tool`` and ``by_intent`` are ordered by call count, highest first.
+        Results are reused for up to ``_STATS_TTL`` seconds while the window's
+        newest id, row count and ratings are unchanged. Each call returns its
+        own copy, so callers may mutate it.
+        """
+        since = _days_ago_iso(days)
+        probe = tuple(self.conn.execute(_STATS_PROBE_SQL, (since,)).fetchone())
+        now = time.monotonic()
+        cached = self._stats_cache.get(days)
+        if cached is not None and cached[0] == probe and now - cached[1] < _STATS_TTL:
+            return copy.deepcopy(cached[2])
+        stats = self._compute_stats(days, since)
+        self._stats_cache[days] = (probe, now, stats)
+        return copy.deepcopy(stats)
 
-        by_intent = dict(
-            self.conn.execute(
-                """SELECT intent, COUNT(*) FROM usage_log
-                   WHERE ts >= ? AND intent IS NOT NULL GROUP BY intent""",
-                (since,),
-            ).fetchall()
+    def _compute_stats(self, days: int, since: str) -> dict[str, Any]:
+        # One statement: the window is read once (the CTE is materialized) and
+        # each breakdown comes back as a JSON array of rows. Aggregate order is
+        # not guaranteed, so breakdowns are sorted here.
+        total, avg_tokens, avg_ms, avg_rating, tools, intents, models, days_json = (
+            self.conn.execute(_STATS_SQL, (since,)).fetchone()
         )
-
-        avg_tokens = self.conn.execute(
-            "SELECT AVG(token_estimate) FROM usage_log WHERE ts >= ? AND token_estimate IS NOT NULL",
-            (since,),
-        ).fetchone()[0]
-
-        avg_ms = self.conn.execute(
-            "SELECT AVG(duration_ms) FROM usage_log WHERE ts >= ? AND duration_ms IS NOT NULL",
-            (since,),
-        ).fetchone()[0]
-
-        avg_rating = self.conn.execute(
-            "SELECT AVG(rating) FROM usage_log WHERE ts >= ? AND rating IS NOT NULL",
-            (since,),
-        ).fetchone()[0]
-
-        top_models = self.conn.execute(
-            """SELECT focus_model, COUNT(*) AS c FROM usage_log
-               WHERE ts >= ? AND focus_model IS NOT NULL
-               GROUP BY focus_model ORDER BY c DESC LIMIT 10""",
-            (since,),
-        ).fetchall()
-
-        daily = self.conn.execute(
-            """SELECT substr(ts, 1, 10) AS day, COUNT(*) AS c
-               FROM usage_log WHERE ts >= ?
-               GROUP BY day ORDER BY day""",
-            (since,),
-        ).fetchall()
-
-        token_trend = self.conn.execute(
-            """SELECT substr(ts, 1, 10) AS day, AVG(token_estimate) AS avg_tok
-               FROM usage_log WHERE ts >= ? AND token_estimate IS NOT NULL
-               GROUP BY day ORDER BY day""",
-            (since,),
-        ).fetchall()
+        by_tool = dict(sorted(json.loads(tools), key=_by_count))
+        by_intent = dict(sorted(json.loads(intents), key=_by_count))
+        top_models = sorted(json.loads(models), key=_by_count)
+        # Calls and average tokens per day; the token trend skips days
+        # where no call recorded an estimate
+        daily = sorted(json.loads(days_json))
 
         return {
             "period_days": days,
@@ -123,23 +177,166 @@ class UsageLogger:
             "avg_rating": round(avg_rating, 2) if avg_rating else None,
             "top_models": [{"model": r[0], "calls": r[1]} for r in top_models],
             "daily_calls": [{"date": r[0], "calls": r[1]} for r in daily],
-            "daily_avg_tokens": [{"date": r[0], "avg_tokens": round(r[1])} for r in token_trend],
+            "daily_avg_tokens": [
+                {"date": r[0], "avg_tokens": round(r[2])} for r in daily if r[2] is not None
+            ],
         }
 
     def recent_queries(self, limit: int = 20) -> list[dict[str, Any]]:
         """Return the ``limit`` most recent log rows."""
-        rows = self.conn.execute(
+        # Plain tuples zipped against one column-name list, not sqlite3.Row
+        cur = self.conn.cursor()
+        cur.row_factory = None
+        cur.execute(
             """SELECT id, ts, tool_name, task_text, intent, focus_model,
                       pivot_count, token_estimate, duration_ms, rating
                FROM usage_log ORDER BY id DESC LIMIT ?""",
             (limit,),
-        ).fetchall()
-        return [dict(r) for r in rows]
+        )
+        columns = [d[0] for d in cur.description]
+        return [dict(zip(columns, row)) for row in cur]
+
+
+class BackgroundUsageLogger:
+    """Queue usage rows for a daemon writer thread with its own connection.
+
+    ``log`` returns immediately with a ``Future`` that resolves to the row id
+    once the row is committed. Rows queued while the writer is busy are
+    committed together, up to ``batch_size`` per transaction.
+    """
+
+    def __init__(self, db_path: Path, *, batch_size: int = 64) -> None:
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._queue: queue.SimpleQueue[tuple[tuple[Any, ...], Future[int]] | None] = (
+            queue.SimpleQueue()
+        )
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def log(
+        self,
+        tool_name: str,
+        *,
+        task_text: str | None = None,
+        intent: str | None = None,
+        focus_model: str | None = None,
+        pivot_count: int | None = None,
+        token_estimate: int | None = None,
+        duration_ms: int | None = None,
+    ) -> Future[int]:
+        """Queue one usage row. The returned future resolves to its row id."""
+        future: Future[int] = Future()
+        row = _usage_row(tool_name, task_text, intent, focus_model,
+                         pivot_count, token_estimate, duration_ms)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ariadne-usage-log", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+            self._queue.put((row, future))
+        return future
+
+    def close(self) -> None:
+        """Commit everything queued so far and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join()
+
+    def _run(self) -> None:
+        try:
+            self._write_loop()
+        except BaseException as exc:
+            self._abandon(exc)
+
+    def _write_loop(self) -> None:
+        conn = open_connection(self.db_path)
+        # The writer owns this connection: autocommit mode with explicit
+        # BEGIN IMMEDIATE takes the write lock up front rather than upgrading
+        # from a deferred read transaction
+        conn.isolation_level = None
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not None and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                pending = [item for item in batch if item is not None]
+                try:
+                    last_id = self._insert(conn, [row for row, _ in pending])
+                except Exception as exc:
+                    # A failed batch fails its own futures; the writer keeps going
+                    for _, future in pending:
+                        future.set_exception(exc)
+                else:
+                    # Rows inserted under one write lock get consecutive ids
+                    first_id = last_id - len(pending) + 1
+                    for row_id, (_, future) in enumerate(pending, first_id):
+                        future.set_result(row_id)
+                if batch[-1] is None:
+                    return
+        finally:
+            conn.close()
+
+    def _abandon(self, exc: BaseException) -> None:
+        """Fail every queued row after the writer died, e.g. the db cannot be opened.
+
+        Clearing ``_thread`` under the lock lets the next ``log`` start a new
+        writer, and no row can be queued between the drain and that reset.
+        """
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[1].set_exception(exc)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, rows: list[tuple[Any, ...]]) -> int:
+        """Insert ``rows`` in one transaction and return the last row id."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT_SQL, rows)
+            last_id: int = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return last_id
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
+def _usage_row(
+    tool_name: str,
+    task_text: str | None = None,
+    intent: str | None = None,
+    focus_model: str | None = None,
+    pivot_count: int | None = None,
+    token_estimate: int | None = None,
+    duration_ms: int | None = None,
+) -> tuple[Any, ...]:
+    ts = datetime.now(timezone.utc).isoformat()
+    return (ts, tool_name, task_text, intent, focus_model,
+            pivot_count, token_estimate, duration_ms)
+
+
+def _by_count(pair: list[Any]) -> tuple[int, str]:
+    """Sort key for ``[name, count]`` pairs: highest count first, then name."""
+    return -pair[1], pair[0]
+
+
 def _days_ago_iso(days: int) -> str:
-    from datetime import timedelta
-    dt = datetime.now(timezone.utc) - timedelta(days=days)
-    return dt.isoformat()
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
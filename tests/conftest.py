@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
+import shutil
 import sqlite3
 from pathlib import Path
 
 import pytest
 
-from ariadne_dbt.indexer import Indexer
+from ariadne_dbt.indexer import Indexer, open_connection
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 MANIFEST_PATH = FIXTURES_DIR / "manifest.json"
@@ -27,13 +28,24 @@ def tmp_db(tmp_path: Path) -> Path:
     return tmp_path / "test.db"
 
 
-@pytest.fixture()
-def indexed_db(tmp_db: Path) -> sqlite3.Connection:
-    """Return a connection to a fully-indexed test database (jaffle_shop)."""
-    with Indexer(tmp_db) as idx:
+@pytest.fixture(scope="session")
+def indexed_template(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Index jaffle_shop once per session; ``indexed_db`` hands out copies."""
+    template = tmp_path_factory.mktemp("template") / "indexed.db"
+    with Indexer(template) as idx:
         idx.index_manifest(MANIFEST_PATH)
-    conn = sqlite3.connect(str(tmp_db))
-    conn.row_factory = sqlite3.Row
+    return template
+
+
+@pytest.fixture()
+def indexed_db(tmp_db: Path, indexed_template: Path) -> sqlite3.Connection:
+    """Return a connection to a fully-indexed test database (jaffle_shop).
+
+    Each test gets its own copy of the session template, so writes never leak
+    between tests.
+    """
+    shutil.copyfile(indexed_template, tmp_db)
+    conn = open_connection(tmp_db)  # same pragmas as the CLI and server
     yield conn
     conn.close()
 
@@ -24,7 +24,7 @@ import pytest
 from ariadne_dbt.capsule import CapsuleBuilder
 from ariadne_dbt.config import CapsuleConfig
 from ariadne_dbt.graph import GraphOps
-from ariadne_dbt.indexer import Indexer
+from ariadne_dbt.indexer import Indexer, open_connection
 from ariadne_dbt.patterns import PatternExtractor
 from ariadne_dbt.search import HybridSearch
 
@@ -50,8 +50,9 @@ def real_db_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
 
 @pytest.fixture(scope="module")
 def real_conn(real_db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(real_db_path))
-    conn.row_factory = sqlite3.Row
+    # Read-only (mode=ro, query_only) with the standard mmap/cache pragmas:
+    # several benchmark processes can share the file without lock contention
+    conn = open_connection(real_db_path, readonly=True)
     yield conn
     conn.close()
 
@@ -2,9 +2,19 @@
 
 from __future__ import annotations
 
+import json
+from dataclasses import asdict
+
 import pytest
 
-from ariadne_dbt.capsule import CapsuleBuilder, detect_intent
+from ariadne_dbt.capsule import (
+    CapsuleBuilder,
+    _estimate_dict_tokens,
+    _full_model_dict,
+    detect_intent,
+)
+from ariadne_dbt.config import load_config
+from ariadne_dbt.search import HybridSearch
 
 
 class TestIntentDetection:
@@ -56,6 +66,36 @@ class TestCapsuleBuilder:
         # Should not wildly exceed budget
         assert capsule.token_estimate <= 5000 * 1.2
 
+    def test_full_model_inline_estimate_tracks_serialized_size(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        for row in indexed_db.execute("SELECT * FROM models"):
+            uid = row["unique_id"]
+            full, cost = _full_model_dict(
+                dict(row), search.get_columns(uid), search.get_tests_for_model(uid)
+            )
+            serialized = _estimate_dict_tokens(full)
+            assert abs(cost - serialized) <= serialized * 0.1
+
+    def test_dict_estimate_same_without_orjson(self, monkeypatch):
+        pytest.importorskip("orjson")
+        d = {"name": "pedidos_año", "columns": [{"name": "id", "type": None}], "ratio": 0.5}
+        with_orjson = _estimate_dict_tokens(d)
+        monkeypatch.setattr("ariadne_dbt.capsule.orjson", None)
+        assert _estimate_dict_tokens(d) == with_orjson
+
+    def test_capsule_serializes_to_plain_json(self, indexed_db):
+        capsule = CapsuleBuilder(indexed_db).build("add revenue metric to fct_orders")
+        payload = json.loads(json.dumps(asdict(capsule)))
+        assert payload["pivot_models"][0]["columns"][0]["name"]
+        assert payload["intent"] == capsule.intent
+
+    def test_capsule_to_dict_matches_asdict(self, indexed_db):
+        capsule = CapsuleBuilder(indexed_db).build(
+            "debug failing test on stg_orders", focus_model="stg_orders"
+        )
+        assert capsule.relevant_tests
+        assert capsule.to_dict() == asdict(capsule)
+
     def test_capsule_has_intent(self, indexed_db):
         builder = CapsuleBuilder(indexed_db)
         capsule = builder.build("debug failing test on stg_orders")
@@ -68,6 +108,7 @@ class TestCapsuleBuilder:
         all_tests = capsule.relevant_tests
         # There should be some test info
         assert isinstance(all_tests, list)
+        assert all(t.test_type and t.unique_id.startswith("test.") for t in all_tests)
 
     def test_capsule_similar_models(self, indexed_db):
         builder = CapsuleBuilder(indexed_db)
@@ -174,6 +215,14 @@ class TestDiscover:
         pivot_names = [m["name"] for m in pivots]
         assert "fct_orders" in pivot_names
 
+    def test_discover_leaves_shared_config_untouched(self, indexed_db, tmp_path):
+        config = load_config(tmp_path).capsule
+        builder = CapsuleBuilder(indexed_db, config)
+        builder.discover("work with orders")
+        assert config.max_pivots == 3
+        # Each load_config call gets its own copy of the memoized config
+        assert load_config(tmp_path).capsule is not config
+
     def test_discover_entry_models_are_pivots(self, indexed_db):
         builder = CapsuleBuilder(indexed_db)
         result = builder.discover(
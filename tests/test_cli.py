@@ -0,0 +1,55 @@
+"""Tests for the ariadne CLI commands."""
+
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from ariadne_dbt.cli import app
+from ariadne_dbt.config import clear_config_cache
+
+runner = CliRunner()
+
+
+@pytest.fixture()
+def dbt_project(tmp_path: Path, manifest_path: Path) -> Path:
+    """Scratch dbt project with a compiled manifest and an ariadne.toml."""
+    (tmp_path / "dbt_project.yml").write_text("name: jaffle_shop\n")
+    (tmp_path / "target").mkdir()
+    shutil.copyfile(manifest_path, tmp_path / "target" / "manifest.json")
+    _write_targets(tmp_path, ["claude_code"])
+    return tmp_path
+
+
+def _write_targets(project: Path, targets: list[str]) -> None:
+    quoted = ", ".join(f'"{t}"' for t in targets)
+    (project / "ariadne.toml").write_text(f"[generator]\ntargets = [{quoted}]\n")
+    clear_config_cache()  # the CLI runs in-process here
+
+
+def _sync(project: Path) -> str:
+    result = runner.invoke(app, ["sync", str(project)])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+class TestSync:
+    def test_unchanged_manifest_still_regenerates_new_targets(self, dbt_project: Path):
+        _sync(dbt_project)
+        assert "No changes since last sync" in _sync(dbt_project)
+
+        _write_targets(dbt_project, ["claude_code", "cursor"])
+        output = _sync(dbt_project)
+        assert "No changes since last sync" not in output
+        assert (dbt_project / ".cursor" / "rules" / "ariadne.mdc").exists()
+
+    def test_unchanged_manifest_restores_deleted_files(self, dbt_project: Path):
+        _sync(dbt_project)
+        skills = dbt_project / ".claude" / "skills"
+        assert skills.exists()
+        shutil.rmtree(skills)
+        _sync(dbt_project)
+        assert skills.exists()
@@ -90,3 +90,22 @@ class TestContextGenerator:
         content = (tmp_path / ".claude" / "CLAUDE.md").read_text()
         # Most connected model should appear
         assert "fct_orders" in content or "dim_customers" in content
+
+    def test_unchanged_inputs_skip_regeneration(self, indexed_db, tmp_path):
+        generator = ContextGenerator(indexed_db)
+        assert generator.generate_all(tmp_path, targets=["claude_code"])
+        assert (tmp_path / ".ariadne" / "generator.stamp").exists()
+
+        assert generator.generate_all(tmp_path, targets=["claude_code"]) == []
+        assert generator.generate_all(tmp_path, targets=["claude_code"], force=True)
+        # A new target set changes the fingerprint
+        assert generator.generate_all(tmp_path, targets=["claude_code", "cursor"])
+
+    def test_missing_output_triggers_regeneration(self, indexed_db, tmp_path):
+        generator = ContextGenerator(indexed_db)
+        generator.generate_all(tmp_path, targets=["claude_code"])
+        claude_md = tmp_path / ".claude" / "CLAUDE.md"
+        claude_md.unlink()
+
+        generator.generate_all(tmp_path, targets=["claude_code"])
+        assert claude_md.exists()
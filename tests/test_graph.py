@@ -4,7 +4,8 @@ from __future__ import annotations
 
 import pytest
 
-from ariadne_dbt.graph import GraphOps
+from ariadne_dbt.graph import _WALK_SQL, GraphOps
+from ariadne_dbt.indexer import Indexer
 
 
 class TestGraphOps:
@@ -45,6 +46,36 @@ class TestGraphOps:
         downstream_ids = [uid for uid, _ in downstream]
         assert "model.jaffle_shop.dim_customers" in downstream_ids
 
+    def test_diamond_keeps_shortest_distance(self, indexed_db):
+        """The dashboard is reachable from fct_orders directly and via dim_customers."""
+        graph = GraphOps(indexed_db)
+        downstream = graph.downstream("model.jaffle_shop.fct_orders", depth=3)
+        ids = [uid for uid, _ in downstream]
+        assert len(ids) == len(set(ids))
+        assert ("exposure.jaffle_shop.orders_dashboard", 1) in downstream
+
+    def test_traversal_cached_until_reindex(self, indexed_db, tmp_db, manifest_path):
+        graph = GraphOps(indexed_db)
+        first = graph.downstream("model.jaffle_shop.stg_orders", depth=2)
+        indexed_db.execute("DELETE FROM edges")
+        assert graph.downstream("model.jaffle_shop.stg_orders", depth=2) == first
+        graph.clear_cache()
+        assert graph.downstream("model.jaffle_shop.stg_orders", depth=2) == []
+        indexed_db.commit()
+
+        with Indexer(tmp_db) as idx:
+            idx.index_manifest(manifest_path)
+        assert graph.downstream("model.jaffle_shop.stg_orders", depth=2) == first
+
+    @pytest.mark.parametrize("direction", ["up", "down"])
+    def test_walk_uses_covering_index(self, indexed_db, direction):
+        plan = " ".join(
+            row[3] for row in indexed_db.execute(
+                "EXPLAIN QUERY PLAN " + _WALK_SQL[direction], ("model.jaffle_shop.fct_orders", 3)
+            )
+        )
+        assert "COVERING INDEX" in plan
+
     def test_depth_zero(self, indexed_db):
         graph = GraphOps(indexed_db)
         assert graph.upstream("model.jaffle_shop.fct_orders", depth=0) == []
@@ -58,6 +89,22 @@ class TestGraphOps:
         model_names = [m["name"] for m in impact["affected_models"]]
         assert "dim_customers" in model_names
 
+    def test_impact_analysis_single_pass(self, indexed_db):
+        graph = GraphOps(indexed_db)
+        impact = graph.impact_analysis("model.jaffle_shop.stg_orders", max_depth=5)
+        assert [m["name"] for m in impact["affected_models"]] == ["fct_orders", "dim_customers"]
+        assert {t["model_id"] for t in impact["affected_tests"]} == {"model.jaffle_shop.fct_orders"}
+        assert [e["name"] for e in impact["affected_exposures"]] == ["orders_dashboard"]
+        assert impact["risk_level"] == "high"
+
+    def test_source_deps_in_lineage_order(self, indexed_db):
+        graph = GraphOps(indexed_db)
+        deps = graph.get_source_deps("model.jaffle_shop.dim_customers")
+        upstream = [uid for uid, _ in graph.upstream("model.jaffle_shop.dim_customers", depth=10)]
+        upstream_sources = [uid for uid in upstream if uid.startswith("source.")]
+        assert [d["unique_id"] for d in deps] == upstream_sources
+        assert len(deps) == 3
+
     def test_impact_analysis_risk_level(self, indexed_db):
         graph = GraphOps(indexed_db)
         impact = graph.impact_analysis("model.jaffle_shop.stg_orders", max_depth=5)
@@ -72,6 +119,24 @@ class TestGraphOps:
         # fct_orders is the most connected node
         assert "fct_orders" in names
 
+    def test_high_centrality_models_cached_per_generation(self, indexed_db):
+        graph = GraphOps(indexed_db)
+        first = graph.get_high_centrality_models(limit=3)
+        indexed_db.execute("UPDATE models SET centrality = 0.0")
+        assert graph.get_high_centrality_models(limit=3) == first
+        indexed_db.execute(
+            "UPDATE index_metadata SET value = value || 'x' WHERE key = 'generation'"
+        )
+        assert all(m["centrality"] == 0.0 for m in graph.get_high_centrality_models(limit=3))
+
+    def test_recompute_centrality_normalised(self, indexed_db):
+        graph = GraphOps(indexed_db)
+        graph.recompute_centrality()
+        assert graph.get_centrality("model.jaffle_shop.fct_orders") == 1.0
+        indexed_db.execute("UPDATE models SET upstream_count = 0, downstream_count = 0")
+        graph.recompute_centrality()
+        assert graph.get_centrality("model.jaffle_shop.fct_orders") == 0.0
+
     def test_no_self_in_traversal(self, indexed_db):
         """The start node should never appear in traversal results."""
         graph = GraphOps(indexed_db)
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import json
 import sqlite3
 from pathlib import Path
 
 import pytest
 
-from ariadne_dbt.indexer import Indexer, _detect_layer
+from ariadne_dbt.config import EngineConfig
+from ariadne_dbt.indexer import Indexer, _detect_layer, open_connection
+from ariadne_dbt.search import HybridSearch
 
 
 class TestLayerDetection:
@@ -31,6 +34,12 @@ class TestLayerDetection:
         result = _detect_layer(["project", "custom", "my_model"], "my_model", {"tags": ["staging"]})
         assert result == "staging"
 
+    def test_keyword_matches_segment_prefix_only(self):
+        assert _detect_layer(["project", "core", "agg_revenue"], "agg_revenue", {}) == "marts"
+        assert _detect_layer(["project", "core", "orders_fct"], "orders_fct", {}) == "other"
+        # Earlier layers win regardless of segment order
+        assert _detect_layer(["project", "marts", "stg_orders"], "stg_orders", {}) == "staging"
+
 
 class TestIndexer:
     def test_models_indexed(self, indexed_db: sqlite3.Connection):
@@ -71,6 +80,14 @@ class TestIndexer:
         count = indexed_db.execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
         assert count == 5  # one row per model
 
+    def test_fts_rows_built_from_tables(self, indexed_db: sqlite3.Connection):
+        row = indexed_db.execute(
+            "SELECT column_names, tags, sql_text FROM search_index WHERE name = 'fct_orders'"
+        ).fetchone()
+        assert set(row["column_names"].split()) >= {"order_id", "customer_id", "amount"}
+        assert set(row["tags"].split()) == {"marts", "daily"}
+        assert 0 < len(row["sql_text"]) <= 2000
+
     def test_metadata_stored(self, indexed_db: sqlite3.Connection):
         adapter = indexed_db.execute(
             "SELECT value FROM index_metadata WHERE key = 'adapter_type'"
@@ -91,6 +108,15 @@ class TestIndexer:
         assert row["upstream_count"] >= 2  # stg_orders, stg_payments
         assert row["downstream_count"] >= 1  # dim_customers
 
+    def test_degree_counts_match_edges(self, indexed_db: sqlite3.Connection):
+        rows = indexed_db.execute("""
+            SELECT m.upstream_count, m.downstream_count,
+                   (SELECT COUNT(*) FROM edges WHERE child_id = m.unique_id),
+                   (SELECT COUNT(*) FROM edges WHERE parent_id = m.unique_id)
+            FROM models m
+        """).fetchall()
+        assert rows and all(r[0] == r[2] and r[1] == r[3] for r in rows)
+
     def test_is_primary_key_flagged(self, indexed_db: sqlite3.Connection):
         # fct_orders.order_id has both not_null and unique tests → primary key
         row = indexed_db.execute(
@@ -109,3 +135,220 @@ class TestIndexer:
             count2 = idx.conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
 
         assert count1 == count2
+
+    def test_manifest_fingerprint_stored(self, tmp_db: Path, manifest_path: Path, tmp_path: Path):
+        with Indexer(tmp_db) as idx:
+            assert not idx.manifest_unchanged(manifest_path)
+            idx.index_manifest(manifest_path)
+            assert idx.manifest_unchanged(manifest_path)
+
+            changed = tmp_path / "manifest.json"
+            changed.write_text(manifest_path.read_text() + "\n")
+            assert not idx.manifest_unchanged(changed)
+
+    def test_older_index_format_is_rebuilt(
+        self, tmp_db: Path, manifest_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        # An index written before path_index existed: older format, no table
+        monkeypatch.setattr("ariadne_dbt.indexer.INDEX_FORMAT", 2)
+        with Indexer(tmp_db) as idx:
+            idx.index_manifest(manifest_path)
+            idx.conn.execute("DROP TABLE path_index")
+        monkeypatch.undo()
+
+        with Indexer(tmp_db) as idx:
+            assert not idx.manifest_unchanged(manifest_path)
+            idx.index_manifest(manifest_path)
+            assert HybridSearch(idx.conn).find_by_path("%staging%")
+
+    def test_readonly_connection_rejects_writes(self, tmp_db: Path, manifest_path: Path):
+        with Indexer(tmp_db) as idx:
+            idx.index_manifest(manifest_path)
+        conn = open_connection(tmp_db, readonly=True)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM models").fetchone()[0] == 5
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM models")
+        finally:
+            conn.close()
+
+    def test_batch_commits_once_and_rolls_back_on_error(self, tmp_db: Path, manifest_path: Path):
+        with Indexer(tmp_db) as idx:
+            with idx.batch():
+                idx.index_manifest(manifest_path)
+                assert idx.conn.in_transaction
+                assert idx.conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert not idx.conn.in_transaction
+            assert idx.conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+            with pytest.raises(RuntimeError):
+                with idx.batch():
+                    idx.index_manifest(manifest_path)
+                    idx.conn.execute("DELETE FROM models")
+                    raise RuntimeError("boom")
+            assert idx.conn.execute("SELECT COUNT(*) FROM models").fetchone()[0] == 5
+
+    def test_batch_recovers_when_begin_fails(self, tmp_db: Path):
+        with Indexer(tmp_db) as idx:
+            blocker = open_connection(tmp_db)
+            blocker.execute("BEGIN IMMEDIATE")
+            try:
+                idx.conn.execute("PRAGMA busy_timeout = 0")
+                with pytest.raises(sqlite3.OperationalError):
+                    with idx.batch():
+                        pass
+                assert not idx.conn.in_transaction
+            finally:
+                blocker.rollback()
+                blocker.close()
+            with idx.batch():
+                assert idx.conn.in_transaction
+
+    @pytest.mark.parametrize("parser", ["auto", "json"])
+    def test_json_parsers_index_identically(self, tmp_db: Path, manifest_path: Path, parser: str):
+        with Indexer(tmp_db, json_parser=parser) as idx:
+            idx.index_manifest(manifest_path)
+            assert idx.conn.execute("SELECT COUNT(*) FROM models").fetchone()[0] == 5
+            assert idx.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0] > 0
+
+    def test_ijson_streaming_indexes_identically(
+        self, tmp_db: Path, manifest_path: Path, indexed_db: sqlite3.Connection
+    ):
+        pytest.importorskip("ijson")
+        tables = ("models", "columns", "sources", "tests", "macros", "exposures", "edges")
+        count = "SELECT COUNT(*) FROM {}"
+        expected = {t: indexed_db.execute(count.format(t)).fetchone()[0] for t in tables}
+        with Indexer(tmp_db.with_name("streamed.db"), json_parser="ijson") as idx:
+            idx.index_manifest(manifest_path)
+            actual = {t: idx.conn.execute(count.format(t)).fetchone()[0] for t in tables}
+            assert idx.get_metadata("project_name") == "jaffle_shop"
+        assert actual == expected
+
+    def test_unknown_json_parser_rejected(self, tmp_db: Path):
+        with pytest.raises(ValueError):
+            Indexer(tmp_db, json_parser="simdjson")
+
+    def test_small_batch_size_indexes_identically(
+        self, tmp_db: Path, manifest_path: Path, indexed_db: sqlite3.Connection
+    ):
+        tables = ("models", "columns", "sources", "tests", "edges", "search_index")
+        count = "SELECT COUNT(*) FROM {}"
+        expected = {t: indexed_db.execute(count.format(t)).fetchone()[0] for t in tables}
+        with Indexer(tmp_db.with_name("batched.db"), batch_size=2) as idx:
+            idx.index_manifest(manifest_path)
+            actual = {t: idx.conn.execute(count.format(t)).fetchone()[0] for t in tables}
+        assert actual == expected
+
+    def test_from_config_uses_indexer_settings(self, tmp_path: Path):
+        cfg = EngineConfig(dbt_project_root=tmp_path)
+        cfg.indexer.batch_size = 7
+        cfg.indexer.use_json_each = True
+        with Indexer.from_config(cfg) as idx:
+            assert idx.db_path == cfg.absolute_index_path
+            assert (idx._batch_size, idx._use_json_each) == (7, True)
+
+    def test_json_each_matches_python_loader(
+        self, tmp_db: Path, manifest_path: Path, indexed_db: sqlite3.Connection
+    ):
+        queries = (
+            "SELECT parent_id, child_id FROM edges ORDER BY 1, 2",
+            "SELECT unique_id, name, package_name, file_path, macro_sql FROM macros ORDER BY 1",
+            "SELECT unique_id, name, type, owner_name, owner_email FROM exposures ORDER BY 1",
+            "SELECT unique_id, upstream_count, downstream_count FROM models ORDER BY 1",
+        )
+        with Indexer(tmp_db.with_name("json_each.db"), use_json_each=True) as idx:
+            idx.index_manifest(manifest_path)
+            for sql in queries:
+                expected = [tuple(r) for r in indexed_db.execute(sql)]
+                assert [tuple(r) for r in idx.conn.execute(sql)] == expected
+            exposure_deps = idx.conn.execute("SELECT depends_on FROM exposures").fetchone()[0]
+            assert json.loads(exposure_deps)
+
+    def test_catalog_and_run_results_enrichment(
+        self, tmp_db: Path, manifest_path: Path, tmp_path: Path
+    ):
+        catalog = tmp_path / "catalog.json"
+        catalog.write_text(json.dumps({"nodes": {
+            "model.jaffle_shop.stg_orders": {
+                "metadata": {"last_modified": "2024-01-01"},
+                "stats": {"num_rows": {"value": 42}},
+                "columns": {"ORDER_ID": {"type": "INTEGER"}},
+            },
+        }}))
+        run_results = tmp_path / "run_results.json"
+        run_results.write_text(json.dumps({"results": [
+            {
+                "unique_id": "test.jaffle_shop.unique_stg_orders_order_id.xxx",
+                "status": "fail",
+                "failures": 3,
+            },
+            {"unique_id": "model.jaffle_shop.stg_orders", "status": "success"},
+        ]}))
+        with Indexer(tmp_db, batch_size=1) as idx:
+            idx.index_manifest(manifest_path)
+            idx.index_catalog(catalog)
+            idx.index_run_results(run_results)
+            conn = idx.conn
+            assert tuple(conn.execute(
+                "SELECT row_count, last_modified FROM models WHERE name = 'stg_orders'"
+            ).fetchone()) == (42, "2024-01-01")
+            assert conn.execute(
+                "SELECT data_type FROM columns"
+                " WHERE model_id = 'model.jaffle_shop.stg_orders' AND name = 'order_id'"
+            ).fetchone()[0] == "INTEGER"
+            assert tuple(conn.execute(
+                "SELECT last_status, last_failures FROM tests"
+                " WHERE unique_id = 'test.jaffle_shop.unique_stg_orders_order_id.xxx'"
+            ).fetchone()) == ("fail", 3)
+
+    def test_catalog_json_each_matches_python_loader(
+        self, tmp_db: Path, manifest_path: Path, tmp_path: Path
+    ):
+        catalog = tmp_path / "catalog.json"
+        catalog.write_text(json.dumps({"nodes": {
+            "model.jaffle_shop.stg_orders": {
+                "metadata": {"last_modified": "2024-01-01"},
+                "stats": {"num_rows": {"value": 42.0}, "num_bytes": {"value": "2048"}},
+                "columns": {"ORDER_ID": {"type": "INTEGER"}, "STATUS": {}},
+            },
+            "model.jaffle_shop.stg_customers": {
+                "metadata": {},
+                "stats": {
+                    "num_rows": {"value": "n/a"}, "row_count": 7, "has_stats": {"value": True},
+                },
+            },
+            "model.jaffle_shop.not_in_manifest": {"stats": {"num_rows": {"value": 1}}},
+        }}))
+        queries = (
+            "SELECT unique_id, row_count, bytes, last_modified FROM models ORDER BY 1",
+            "SELECT model_id, name, data_type FROM columns ORDER BY 1, 2",
+        )
+        results = []
+        for use_json_each in (False, True):
+            db_path = tmp_db.with_name(f"catalog_{use_json_each}.db")
+            with Indexer(db_path, use_json_each=use_json_each) as idx:
+                idx.index_manifest(manifest_path)
+                idx.index_catalog(catalog)
+                results.append([[tuple(r) for r in idx.conn.execute(sql)] for sql in queries])
+        assert results[0] == results[1]
+        assert ("model.jaffle_shop.stg_orders", 42, 2048, "2024-01-01") in results[1][0]
+        assert ("model.jaffle_shop.stg_customers", 7, None, None) in results[1][0]
+
+    def test_secondary_indexes_rebuilt_after_reindex(self, tmp_db: Path, manifest_path: Path):
+        index_sql = (
+            "SELECT name FROM sqlite_master"
+            " WHERE type = 'index' AND sql IS NOT NULL ORDER BY name"
+        )
+        with Indexer(tmp_db) as idx:
+            before = idx.conn.execute(index_sql).fetchall()
+            idx.index_manifest(manifest_path)
+            assert idx.conn.execute(index_sql).fetchall() == before
+            assert idx.conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+    def test_model_list_tables_populated(self, indexed_db: sqlite3.Connection):
+        refs = indexed_db.execute(
+            "SELECT ref_name FROM model_refs"
+            " WHERE model_id = 'model.jaffle_shop.fct_orders' ORDER BY 1"
+        ).fetchall()
+        assert [r[0] for r in refs] == ["stg_orders", "stg_payments"]
+        assert indexed_db.execute("SELECT COUNT(*) FROM model_sources").fetchone()[0] == 3
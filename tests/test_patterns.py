@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import pytest
 
+from ariadne_dbt.indexer import Indexer
 from ariadne_dbt.patterns import PatternExtractor
 
 
@@ -19,6 +20,12 @@ class TestPatternExtractor:
         assert stats.source_count == 3
         assert stats.test_count == 5
 
+    def test_get_stats_plain_tuple_rows(self, indexed_db):
+        indexed_db.row_factory = None
+        stats = PatternExtractor(indexed_db).get_stats()
+        assert stats.project_name == "jaffle_shop"
+        assert stats.staging_count == 3
+
     def test_get_patterns_naming(self, indexed_db):
         extractor = PatternExtractor(indexed_db)
         patterns = extractor.get_patterns()
@@ -68,3 +75,32 @@ class TestPatternExtractor:
         # Coverage should be between 0 and 100
         for layer, pct in patterns.test_coverage_by_layer.items():
             assert 0.0 <= pct <= 100.0
+
+    def test_patterns_memoized_until_reindex(self, indexed_db, tmp_db, manifest_path):
+        extractor = PatternExtractor(indexed_db)
+        first = extractor.get_patterns()
+        assert extractor.get_patterns() is first
+        assert extractor.get_stats() is extractor.get_stats()
+
+        with Indexer(tmp_db) as idx:
+            idx.index_manifest(manifest_path)
+        assert extractor.get_patterns() is not first
+
+    def test_invalidate_drops_cached_results(self, indexed_db):
+        extractor = PatternExtractor(indexed_db)
+        first = extractor.get_patterns()
+        extractor.invalidate()
+        assert extractor.get_patterns() is not first
+        assert extractor.get_patterns().test_coverage_by_layer == first.test_coverage_by_layer
+
+    def test_coverage_by_layer_values(self, indexed_db):
+        coverage = PatternExtractor(indexed_db).get_patterns().test_coverage_by_layer
+        assert coverage == {"staging": 7.7, "intermediate": 0.0, "marts": 18.2, "other": 0.0}
+
+    def test_common_tags_from_model_tags(self, indexed_db):
+        before = PatternExtractor(indexed_db).get_patterns().common_tags
+        indexed_db.execute(
+            "INSERT INTO model_tags (model_id, tag) SELECT unique_id, 'pii' FROM models"
+        )
+        after = PatternExtractor(indexed_db).get_patterns().common_tags
+        assert after == ["pii", *before]
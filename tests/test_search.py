@@ -65,6 +65,26 @@ class TestHybridSearch:
         result_ids = {r.unique_id for r in results}
         assert "model.jaffle_shop.fct_orders" not in result_ids
 
+    def test_search_scores_ranked_in_sql(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        results = search.search("orders", intent="debug", limit=5)
+        assert [r.score for r in results] == sorted((r.score for r in results), reverse=True)
+        stg = next(r for r in results if r.name == "stg_orders")
+        assert stg.layer_boost == 0.10
+        assert stg.name_bonus == 0.15
+
+    def test_search_exclude_ids_before_limit(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        top = search.search("orders", limit=1)[0]
+        results = search.search("orders", limit=1, exclude_ids={top.unique_id})
+        assert len(results) == 1 and results[0].unique_id != top.unique_id
+
+    def test_search_layer_filter(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        results = search.search("orders", limit=2, layer="staging")
+        assert results and all(r.layer == "staging" for r in results)
+        assert search.search("orders", layer="no_such_layer") == []
+
     def test_get_model_by_name(self, indexed_db):
         search = HybridSearch(indexed_db)
         row = search.get_model_by_name("fct_orders")
@@ -81,6 +101,13 @@ class TestHybridSearch:
         row = search.get_model_by_id("model.jaffle_shop.fct_orders")
         assert row is not None
 
+    def test_get_model_by_name_or_id(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        by_name = search.get_model_by_name_or_id("FCT_ORDERS")
+        by_id = search.get_model_by_name_or_id("model.jaffle_shop.fct_orders")
+        assert by_name and by_id and by_name["unique_id"] == by_id["unique_id"]
+        assert search.get_model_by_name_or_id("nonexistent") is None
+
     def test_get_columns(self, indexed_db):
         search = HybridSearch(indexed_db)
         cols = search.get_columns("model.jaffle_shop.fct_orders")
@@ -88,6 +115,9 @@ class TestHybridSearch:
         col_names = [c["name"] for c in cols]
         assert "order_id" in col_names
         assert "amount" in col_names
+        by_name = {c["name"]: c["test_types"] for c in cols}
+        assert sorted(by_name["order_id"]) == ["not_null", "unique"]
+        assert by_name["amount"] == []
 
     def test_get_tests_for_model(self, indexed_db):
         search = HybridSearch(indexed_db)
@@ -105,6 +135,17 @@ class TestHybridSearch:
         assert coverage["coverage_pct"] >= 0
         assert coverage["coverage_pct"] <= 100
 
+    def test_get_macros_for_model(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        assert search.get_macros_for_model("model.jaffle_shop.stg_payments") == []
+        indexed_db.execute(
+            "UPDATE models SET compiled_code = 'select {{ cents_to_dollars(\"amount\") }}' "
+            "WHERE name = 'stg_payments'"
+        )
+        macros = search.get_macros_for_model("model.jaffle_shop.stg_payments")
+        assert [m["name"] for m in macros] == ["cents_to_dollars"]
+        assert search.get_macros_for_model("model.jaffle_shop.missing") == []
+
     def test_get_sources_for_model(self, indexed_db):
         search = HybridSearch(indexed_db)
         sources = search.get_sources_for_model("model.jaffle_shop.stg_orders")
@@ -149,6 +190,16 @@ class TestHybridSearch:
         ])
         assert len(resolved) == 1
 
+    def test_resolve_file_paths_keeps_input_order(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        resolved = search.resolve_file_paths([
+            "models/staging/stg_orders.sql",
+            "models/marts/_marts.yml",
+            "dim_customers",
+            "elsewhere/STG_ORDERS.sql",
+        ])
+        assert resolved == ["model.jaffle_shop.stg_orders", "model.jaffle_shop.dim_customers"]
+
     # ── find_by_column ───────────────────────────────────────────────────
 
     def test_find_by_column_order_id(self, indexed_db):
@@ -191,3 +242,14 @@ class TestHybridSearch:
         search = HybridSearch(indexed_db)
         results = search.find_by_path("%", limit=2)
         assert len(results) <= 2
+
+    def test_find_by_path_matches_like_scan(self, indexed_db):
+        search = HybridSearch(indexed_db)
+        for pattern in ("%staging%", "%STG_%", "models/marts/%", "%.sql"):
+            expected = [
+                r[0] for r in indexed_db.execute(
+                    "SELECT unique_id FROM models WHERE file_path LIKE ? ORDER BY name",
+                    (pattern,),
+                )
+            ]
+            assert [r["unique_id"] for r in search.find_by_path(pattern)] == expected
@@ -7,8 +7,8 @@ from pathlib import Path
 
 import pytest
 
-from ariadne_dbt.indexer import Indexer
-from ariadne_dbt.usage import UsageLogger
+from ariadne_dbt.indexer import Indexer, open_connection
+from ariadne_dbt.usage import BackgroundUsageLogger, UsageLogger
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 MANIFEST_PATH = FIXTURES_DIR / "manifest.json"
@@ -20,8 +20,7 @@ def usage_db(tmp_path: Path) -> sqlite3.Connection:
     db_path = tmp_path / "usage.db"
     with Indexer(db_path) as idx:
         idx.index_manifest(MANIFEST_PATH)
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
+    conn = open_connection(db_path)  # same pragmas as the CLI and server
     yield conn
     conn.close()
 
@@ -54,6 +53,30 @@ class TestUsageLogger:
         assert row["duration_ms"] == 120
         assert row["rating"] is None
 
+    def test_log_many_inserts_in_order(self, usage_db: sqlite3.Connection) -> None:
+        logger = UsageLogger(usage_db)
+        logger.log_many([
+            {"tool_name": "search_models", "task_text": "revenue"},
+            {"tool_name": "get_context_capsule", "intent": "debug", "pivot_count": 2},
+        ])
+        rows = usage_db.execute(
+            "SELECT tool_name, task_text, intent, pivot_count FROM usage_log ORDER BY id"
+        ).fetchall()
+        assert [tuple(r) for r in rows] == [
+            ("search_models", "revenue", None, None),
+            ("get_context_capsule", None, "debug", 2),
+        ]
+
+    def test_batch_commits_once(self, usage_db: sqlite3.Connection) -> None:
+        logger = UsageLogger(usage_db)
+        with logger.batch():
+            log_id = logger.log("search_models", task_text="a")
+            logger.rate(log_id, 3)
+            assert usage_db.in_transaction
+        assert not usage_db.in_transaction
+        row = usage_db.execute("SELECT rating FROM usage_log WHERE id = ?", (log_id,)).fetchone()
+        assert row[0] == 3
+
     def test_rate_updates_row(self, usage_db: sqlite3.Connection) -> None:
         logger = UsageLogger(usage_db)
         log_id = logger.log("get_context_capsule", task_text="test")
@@ -90,6 +113,72 @@ class TestUsageLogger:
         assert stats["by_intent"]["explore"] == 1
         assert stats["avg_token_estimate"] == round((1000 + 2000 + 500) / 3)
 
+    def test_get_stats_daily_series(self, usage_db: sqlite3.Connection) -> None:
+        logger = UsageLogger(usage_db)
+        logger.log("search_models", token_estimate=100)
+        logger.log("search_models", token_estimate=300)
+        logger.log("rate_capsule")
+
+        stats = logger.get_stats(days=30)
+        assert [d["calls"] for d in stats["daily_calls"]] == [3]
+        assert [d["avg_tokens"] for d in stats["daily_avg_tokens"]] == [200]
+        assert stats["avg_duration_ms"] is None
+
+    def test_get_stats_reads_covering_index(self, usage_db: sqlite3.Connection) -> None:
+        statements: list[str] = []
+        usage_db.set_trace_callback(statements.append)
+        UsageLogger(usage_db).get_stats(days=30)
+        usage_db.set_trace_callback(None)
+        assert statements
+        for sql in statements:
+            plan = " ".join(row[3] for row in usage_db.execute("EXPLAIN QUERY PLAN " + sql))
+            assert "COVERING INDEX idx_usage_log_ts_cover" in plan, sql
+
+    def test_get_stats_cached_until_log(self, usage_db: sqlite3.Connection) -> None:
+        logger = UsageLogger(usage_db)
+        logger.log("search_models")
+        first = logger.get_stats(days=30)
+        calls = []
+        usage_db.set_trace_callback(calls.append)
+        assert logger.get_stats(days=30) == first
+        usage_db.set_trace_callback(None)
+        assert len(calls) == 1  # only the probe ran
+        logger.log("search_models")
+        assert logger.get_stats(days=30)["total_calls"] == 2
+
+    def test_get_stats_returns_independent_copies(self, usage_db: sqlite3.Connection) -> None:
+        logger = UsageLogger(usage_db)
+        logger.log("search_models", intent="debug")
+        first = logger.get_stats(days=30)
+        first["total_calls"] = 99
+        first["by_tool"].clear()
+        first["daily_calls"].append({"date": "x", "calls": 1})
+        again = logger.get_stats(days=30)
+        assert again["total_calls"] == 1
+        assert again["by_tool"] == {"search_models": 1}
+        assert len(again["daily_calls"]) == 1
+
+    def test_get_stats_sees_ratings_from_other_connections(
+        self, usage_db: sqlite3.Connection
+    ) -> None:
+        logger = UsageLogger(usage_db)
+        log_id = logger.log("search_models")
+        assert logger.get_stats(days=30)["avg_rating"] is None
+        # Stands in for the server's per-thread connection; shares no cache
+        UsageLogger(usage_db).rate(log_id, 4)
+        assert logger.get_stats(days=30)["avg_rating"] == 4
+
+    def test_get_stats_breakdowns_ordered_by_count(self, usage_db: sqlite3.Connection) -> None:
+        logger = UsageLogger(usage_db)
+        logger.log("search_models", task_text="a")
+        logger.log("get_context_capsule", task_text="b", intent="debug")
+        logger.log("get_context_capsule", task_text="c", intent="debug")
+        logger.log("get_context_capsule", task_text="d", intent="explore")
+
+        stats = logger.get_stats(days=30)
+        assert list(stats["by_tool"]) == ["get_context_capsule", "search_models"]
+        assert list(stats["by_intent"]) == ["debug", "explore"]
+
     def test_get_stats_top_models(self, usage_db: sqlite3.Connection) -> None:
         logger = UsageLogger(usage_db)
         logger.log("get_context_capsule", focus_model="fct_orders")
@@ -109,3 +198,36 @@ class TestUsageLogger:
         assert len(rows) == 3
         # Most recent first
         assert rows[0]["task_text"] == "query 4"
+
+
+class TestBackgroundUsageLogger:
+    def test_rows_committed_by_writer_thread(self, usage_db: sqlite3.Connection) -> None:
+        db_path = Path(usage_db.execute("PRAGMA database_list").fetchone()["file"])
+        logger = BackgroundUsageLogger(db_path, batch_size=2)
+        futures = [logger.log("search_models", task_text=f"query {i}") for i in range(5)]
+        logger.close()
+        ids = [f.result(timeout=5) for f in futures]
+        assert ids == sorted(ids) and len(set(ids)) == 5
+        rows = usage_db.execute("SELECT id, task_text FROM usage_log ORDER BY id").fetchall()
+        assert [(r["id"], r["task_text"]) for r in rows] == [
+            (log_id, f"query {i}") for i, log_id in enumerate(ids)
+        ]
+
+    def test_rate_after_background_log(self, usage_db: sqlite3.Connection) -> None:
+        db_path = Path(usage_db.execute("PRAGMA database_list").fetchone()["file"])
+        logger = BackgroundUsageLogger(db_path)
+        log_id = logger.log("get_context_capsule", task_text="test").result(timeout=5)
+        UsageLogger(usage_db).rate(log_id, 4)
+        logger.close()
+        assert usage_db.execute(
+            "SELECT rating FROM usage_log WHERE id = ?", (log_id,)
+        ).fetchone()[0] == 4
+
+    def test_unopenable_db_fails_futures(self, tmp_path: Path) -> None:
+        logger = BackgroundUsageLogger(tmp_path / "missing" / "index.db")
+        first = logger.log("get_context_capsule")
+        assert isinstance(first.exception(timeout=5), sqlite3.OperationalError)
+        # The dead writer is replaced, so later rows fail promptly too
+        second = logger.log("search_models")
+        assert isinstance(second.exception(timeout=5), sqlite3.OperationalError)
+        logger.close()